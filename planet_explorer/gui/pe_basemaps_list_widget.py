@@ -197,10 +197,8 @@ class BasemapItemWidget(QWidget):
                 self,
             )
 
-    def set_thumbnail(self, img):
-        pixmap = QPixmap(img)
-        thumb = pixmap.scaled(48, 48, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.iconLabel.setPixmap(thumb)
+    def set_thumbnail(self, thumbnail):
+        self.iconLabel.setPixmap(QPixmap.fromImage(thumbnail.small))
 
     def showContextMenu(self, evt):
         menu = QMenu()
@@ -0,0 +1,888 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    pe_dailyimages_results_model.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import datetime
+import os
+from collections import namedtuple
+
+import iso8601
+from qgis.core import QgsGeometry
+from qgis.PyQt.QtCore import (
+    QAbstractItemModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QRectF,
+    QSize,
+    Qt,
+    QTimer,
+    pyqtSignal,
+)
+from qgis.PyQt.QtGui import QIcon, QPen, QPixmap, QTextDocument
+from qgis.PyQt.QtWidgets import (
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QStyleOptionViewItem,
+    QToolTip,
+)
+
+from ..gui.pe_results_configuration_dialog import PlanetNodeMetadata
+from ..pe_utils import PLANET_COLOR, AoiCoverageCalculator, qgsgeometry_from_geojson
+from ..planet_api.p_client import ITEM_ASSET_DL_REGEX, PlanetClient
+from .pe_thumbnails import CompoundThumbnail
+
+plugin_path = os.path.split(os.path.dirname(__file__))[0]
+
+
+def iconPath(f):
+    return os.path.join(plugin_path, "resources", f)
+
+
+CHILD_COUNT_THRESHOLD_FOR_PREVIEW = 100
+
+ID = "id"
+SATELLITE_ID = "satellite_id"
+INSTRUMENT = "instrument"
+PROPERTIES = "properties"
+GEOMETRY = "geometry"
+ITEM_TYPE = "item_type"
+PERMISSIONS = "_permissions"
+SORT_CRITERIA = "acquired"
+
+SUBTEXT_STYLE = "color: rgb(100,100,100);"
+SUBTEXT_STYLE_WITH_NEW_CHILDREN = "color: rgb(157,0,165);"
+
+ADD_PREVIEW_ICON = QIcon(iconPath("mActionAddXyzLayer.svg"))
+ZOOMTO_ICON = QIcon(":/plugins/planet_explorer/zoom-target.svg")
+LOCK_ICON = QIcon(":/plugins/planet_explorer/lock-light.svg")
+PLACEHOLDER_THUMB = ":/plugins/planet_explorer/thumb-placeholder-128.svg"
+
+NO_ACCESS_TOOLTIP = "Contact sales to purchase access"
+TOO_MANY_TOOLTIP = "Too many images to preview"
+ADD_PREVIEW_TOOLTIP = "Add preview layer to map"
+ZOOM_TO_TOOLTIP = "Zoom to extent"
+
+ROW_HEIGHT = 56
+THUMB_SIZE = 48
+ICON_SIZE = 18
+LOCK_SIZE = 16
+SPACING = 6
+
+ItemLayout = namedtuple(
+    "ItemLayout", ["checkbox", "lock", "thumbnail", "text", "zoom", "preview"]
+)
+
+
+class SceneRecord:
+    """
+    Compact representation of an API item, with everything the results
+    tree needs parsed once when the item is received.
+    """
+
+    __slots__ = (
+        "id",
+        "image",
+        "epoch",
+        "date_key",
+        "item_type",
+        "item_type_name",
+        "satellite",
+        "instrument",
+        "downloadable",
+        "geom",
+        "thumbnail_url",
+    )
+
+    def __init__(self, image, item_type_names, api_key):
+        properties = image[PROPERTIES]
+        acquired = iso8601.parse_date(properties[SORT_CRITERIA])
+        self.id = image[ID]
+        self.image = image
+        self.epoch = acquired.timestamp()
+        self.date_key = acquired.date()
+        self.item_type = properties[ITEM_TYPE]
+        self.item_type_name = item_type_names.get(self.item_type, self.item_type)
+        self.satellite = properties[SATELLITE_ID]
+        self.instrument = properties.get(INSTRUMENT, "")
+        self.downloadable = any(
+            [ITEM_ASSET_DL_REGEX.match(s) is not None for s in image[PERMISSIONS]]
+        )
+        self.geom = qgsgeometry_from_geojson(image[GEOMETRY])
+        self.thumbnail_url = f"{image['_links']['thumbnail']}?api_key={api_key}"
+
+    def acquired(self):
+        return datetime.datetime.fromtimestamp(self.epoch, datetime.timezone.utc)
+
+
+def scene_records(images):
+    """
+    Creates the scene records for a list of API items
+    """
+    client = PlanetClient.getInstance()
+    item_type_names = client.item_types_names()
+    api_key = client.api_key()
+    return [SceneRecord(image, item_type_names, api_key) for image in images]
+
+
+class ResultNode:
+    """
+    Base class for the nodes of the daily imagery results tree.
+    """
+
+    __slots__ = (
+        "__weakref__",
+        "model",
+        "parent",
+        "row",
+        "children",
+        "has_new",
+        "downloadable",
+        "geom",
+        "compound",
+        "icon",
+        "_text",
+        "n_scenes",
+        "n_downloadable",
+        "n_checked",
+    )
+
+    def __init__(self):
+        self.model = None
+        self.parent = None
+        self.row = 0
+        self.children = []
+        self.has_new = True
+        self.downloadable = False
+        self.geom = QgsGeometry()
+        self.compound = None
+        self.icon = None
+        self._text = None
+        # scene counters for the subtree, kept up to date by the model
+        self.n_scenes = 0
+        self.n_downloadable = 0
+        self.n_checked = 0
+
+    def images(self):
+        images = []
+        for child in self.children:
+            images.extend(child.images())
+        return images
+
+    def scene_nodes(self):
+        nodes = []
+        for child in self.children:
+            nodes.extend(child.scene_nodes())
+        return nodes
+
+    def scene_count(self):
+        return self.n_scenes
+
+    def check_state(self):
+        if self.n_checked == 0:
+            return Qt.Unchecked
+        if self.n_checked == self.n_downloadable:
+            return Qt.Checked
+        return Qt.PartiallyChecked
+
+    def text(self):
+        if self._text is None:
+            self._text = self._get_text()
+        return self._text
+
+    def _get_text(self):
+        return ""
+
+    def tooltip(self):
+        return ""
+
+    def can_preview(self):
+        return (
+            self.downloadable
+            and self.scene_count() <= CHILD_COUNT_THRESHOLD_FOR_PREVIEW
+        )
+
+    def preview_tooltip(self):
+        if not self.downloadable:
+            return NO_ACCESS_TOOLTIP
+        elif self.scene_count() > CHILD_COUNT_THRESHOLD_FOR_PREVIEW:
+            return TOO_MANY_TOOLTIP
+        return ADD_PREVIEW_TOOLTIP
+
+    def update_for_children(self):
+        self._text = None
+        self.downloadable = self.n_downloadable > 0
+        self.geom = QgsGeometry.collectGeometry([c.geom for c in self.children])
+
+    def render_thumbnail(self):
+        """
+        Paints the scene thumbnails received since the last call into the
+        compound thumbnail of the group
+        """
+        if self.compound is not None and self.compound.has_tiles():
+            self.icon = self.compound.render().scaled(
+                THUMB_SIZE, THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation
+            )
+
+
+class DateNode(ResultNode):
+
+    __slots__ = ("date", "date_text", "itemtype", "item_type_name")
+
+    def __init__(self, record):
+        super().__init__()
+        self.compound = CompoundThumbnail()
+        self.date = record.date_key
+        self.date_text = self.date.strftime("%b %d, %Y")
+        self.itemtype = record.item_type
+        self.item_type_name = record.item_type_name
+
+    def _get_text(self):
+        count_style = (
+            SUBTEXT_STYLE if not self.has_new else SUBTEXT_STYLE_WITH_NEW_CHILDREN
+        )
+        return f"""{self.date_text}<br>
+                    <b>{self.item_type_name}</b><br>
+                    <span style="{count_style}">{self.scene_count()} images</span>"""
+
+    def tooltip(self):
+        if not self.downloadable:
+            return f"{NO_ACCESS_TOOLTIP}.\nUse the link in the ⓘ menu."
+        return ""
+
+    def preview_tooltip(self):
+        if not self.downloadable:
+            return self.tooltip()
+        return super().preview_tooltip()
+
+    def name(self):
+        return f"{self.date_text} | {self.item_type_name}"
+
+
+class SatelliteNode(ResultNode):
+
+    __slots__ = ("satellite", "instrument", "numbered_rows")
+
+    def __init__(self, satellite, instrument):
+        super().__init__()
+        self.compound = CompoundThumbnail()
+        self.satellite = satellite
+        self.instrument = instrument
+        # leading scenes whose row is up to date
+        self.numbered_rows = 0
+
+    def scene_row(self, scene_node):
+        """
+        Returns the row of a scene. Scenes inserted before others shift
+        them, and their rows are only renumbered when next needed, once
+        for all the scenes inserted since then.
+        """
+        if self.numbered_rows < len(self.children):
+            for i in range(self.numbered_rows, len(self.children)):
+                self.children[i].row = i
+            self.numbered_rows = len(self.children)
+        return scene_node.row
+
+    def _get_text(self):
+        count_style = (
+            SUBTEXT_STYLE if not self.has_new else SUBTEXT_STYLE_WITH_NEW_CHILDREN
+        )
+        return (
+            f'<span style="{SUBTEXT_STYLE}"> Satellite {self.satellite}'
+            f" {self.instrument} </span>"
+            f'<span style="{count_style}">({len(self.children)} images)</span>'
+        )
+
+    def name(self):
+        return f"Satellite {self.satellite}"
+
+
+class SceneNode(ResultNode):
+
+    __slots__ = ("record",)
+
+    def __init__(self, record):
+        super().__init__()
+        self.record = record
+        self.has_new = False
+        self.n_scenes = 1
+        self.downloadable = record.downloadable
+        self.n_downloadable = 1 if self.downloadable else 0
+        self.geom = record.geom
+
+    @property
+    def image(self):
+        return self.record.image
+
+    def images(self):
+        return [self.image]
+
+    def scene_nodes(self):
+        return [self]
+
+    def can_preview(self):
+        return self.downloadable
+
+    def _get_text(self):
+        metadata = ""
+        metadata_to_show = self.model.metadata_to_show() if self.model else []
+        for i, value in enumerate(metadata_to_show):
+            spacer = "<br>" if i == 1 else " "
+            if value == PlanetNodeMetadata.AREA_COVER:
+                area_coverage = self.model.coverage_calculator().coverage(
+                    self.record.image, self.record.geom
+                )
+                if area_coverage is not None:
+                    metadata += f"{value.value}:{area_coverage:.0f}{spacer}"
+                else:
+                    metadata += f"{value.value}:--{spacer}"
+            else:
+                prop = self.record.image[PROPERTIES].get(value.value, "--")
+                metadata += f"{value.value}:{prop}{spacer}"
+        acquired = self.record.acquired()
+        return f"""{acquired:%b %d, %Y}<span style="{SUBTEXT_STYLE}"> {acquired:%H:%M:%S} UTC</span><br>
+                        <b>{self.record.item_type_name}</b><br>
+                        <span style="{SUBTEXT_STYLE}">{metadata}</span>
+                    """  # noqa
+
+    def name(self):
+        return f"{self.record.acquired():%b %d, %Y %H:%M:%S} | {self.record.item_type_name}"
+
+    def update_for_children(self):
+        pass
+
+    def set_thumbnail(self, thumbnail):
+        # the small image is enough for both the row and the compound
+        # thumbnails of its groups, which are painted at the same size
+        self.icon = QPixmap.fromImage(thumbnail.small)
+        if self.model is not None:
+            self.model.thumbnail_changed(self)
+
+
+class DailyImagesResultsModel(QAbstractItemModel):
+    """
+    Item model for daily imagery search results, organized as a
+    date -> satellite -> scene hierarchy.
+    """
+
+    checkStateChanged = pyqtSignal()
+
+    NodeRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._date_nodes = []
+        # (date, item_type) -> DateNode
+        self._date_index = {}
+        # (date, item_type, satellite) -> SatelliteNode
+        self._satellite_index = {}
+        # groups created by the last page of results
+        self._new_groups = []
+        # id -> SceneNode, for the checked scenes
+        self._checked = {}
+        # scenes whose thumbnails have arrived since the last repaint
+        self._pending_thumbnails = {}
+        self._thumbnails_flush_scheduled = False
+        self._request = None
+        self._coverage_calculator = AoiCoverageCalculator(None)
+        self._metadata_to_show = [
+            PlanetNodeMetadata.CLOUD_PERCENTAGE,
+            PlanetNodeMetadata.GROUND_SAMPLE_DISTANCE,
+        ]
+
+    def request(self):
+        return self._request
+
+    def set_request(self, request):
+        self._request = request
+        if not self._coverage_calculator.has_same_aoi(request):
+            self._coverage_calculator = AoiCoverageCalculator(request)
+
+    def coverage_calculator(self):
+        return self._coverage_calculator
+
+    def metadata_to_show(self):
+        return self._metadata_to_show
+
+    def set_metadata_to_show(self, metadata_to_show):
+        self._metadata_to_show = metadata_to_show
+        for node in self.scene_nodes():
+            node._text = None
+        self._emit_data_changed_for_all()
+
+    def date_nodes(self):
+        return list(self._date_nodes)
+
+    def scene_nodes(self):
+        nodes = []
+        for date_node in self._date_nodes:
+            nodes.extend(date_node.scene_nodes())
+        return nodes
+
+    def checked_count(self):
+        return len(self._checked)
+
+    def checked_images(self):
+        return [node.image for node in self._checked.values()]
+
+    def clear(self):
+        self.beginResetModel()
+        for date_node in self._date_nodes:
+            date_node.model = None
+            for satellite_node in date_node.children:
+                satellite_node.model = None
+                for scene_node in satellite_node.children:
+                    scene_node.model = None
+        self._date_nodes = []
+        self._date_index = {}
+        self._satellite_index = {}
+        self._new_groups = []
+        self._checked = {}
+        self._pending_thumbnails = {}
+        self.endResetModel()
+
+    def node(self, index):
+        if not index.isValid():
+            return None
+        return index.internalPointer()
+
+    def index_for_node(self, node):
+        if node is None or node.model is not self:
+            return QModelIndex()
+        if isinstance(node, SceneNode):
+            row = node.parent.scene_row(node)
+        else:
+            row = node.row
+        return self.createIndex(row, 0, node)
+
+    def add_records(self, records):
+        """
+        Adds a page of search results, as scene records, to the model.
+
+        Only the groups that receive scenes from this page, and the ones
+        that stop being new because of it, are refreshed.
+        """
+        dirty = {}
+        for node in self._new_groups:
+            node.has_new = False
+            node._text = None
+            dirty[node] = None
+        self._new_groups = []
+
+        touched = self._add_scenes(records)
+
+        date_nodes = {}
+        for satellite_node in touched:
+            satellite_node.update_for_children()
+            date_nodes[satellite_node.parent] = None
+        for date_node in date_nodes:
+            date_node.update_for_children()
+
+        dirty.update(touched)
+        dirty.update(date_nodes)
+        for node in dirty:
+            index = self.index_for_node(node)
+            self.dataChanged.emit(index, index)
+
+    def _add_scenes(self, records):
+        """
+        Places scenes in their groups and returns the satellite nodes
+        that received them, in insertion order
+        """
+        touched = {}
+        for record in records:
+            scene_node = SceneNode(record)
+            satellite_node = self._node_for_satellite(record)
+            self._insert_scene(satellite_node, scene_node)
+            touched[satellite_node] = None
+        return touched
+
+    def _node_for_date(self, record):
+        key = (record.date_key, record.item_type)
+        date_node = self._date_index.get(key)
+        if date_node is None:
+            date_node = DateNode(record)
+            date_node.model = self
+            date_node.row = len(self._date_nodes)
+            self.beginInsertRows(QModelIndex(), date_node.row, date_node.row)
+            self._date_nodes.append(date_node)
+            self._date_index[key] = date_node
+            self._new_groups.append(date_node)
+            self.endInsertRows()
+        return date_node
+
+    def _node_for_satellite(self, record):
+        key = (record.date_key, record.item_type, record.satellite)
+        satellite_node = self._satellite_index.get(key)
+        if satellite_node is None:
+            date_node = self._node_for_date(record)
+            satellite_node = SatelliteNode(record.satellite, record.instrument)
+            satellite_node.model = self
+            satellite_node.parent = date_node
+            satellite_node.row = len(date_node.children)
+            self.beginInsertRows(
+                self.index_for_node(date_node), satellite_node.row, satellite_node.row
+            )
+            date_node.children.append(satellite_node)
+            self._satellite_index[key] = satellite_node
+            self._new_groups.append(satellite_node)
+            self.endInsertRows()
+        return satellite_node
+
+    def _insert_scene(self, satellite_node, scene_node):
+        children = satellite_node.children
+        epoch = scene_node.record.epoch
+        lo, hi = 0, len(children)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if epoch < children[mid].record.epoch:
+                hi = mid
+            else:
+                lo = mid + 1
+        scene_node.model = self
+        scene_node.parent = satellite_node
+        scene_node.row = lo
+        self.beginInsertRows(self.index_for_node(satellite_node), lo, lo)
+        children.insert(lo, scene_node)
+        satellite_node.numbered_rows = min(satellite_node.numbered_rows, lo)
+        self.endInsertRows()
+        bbox = scene_node.record.geom.boundingBox()
+        node = satellite_node
+        while node is not None:
+            node.n_scenes += 1
+            node.n_downloadable += scene_node.n_downloadable
+            node.compound.add_footprint(scene_node.record.id, bbox)
+            node = node.parent
+
+    def thumbnail_requests(self, index):
+        """
+        Returns the (scene node, url) pairs of the thumbnails still missing
+        for the row of an index. For groups, these are the thumbnails of
+        all their scenes, needed to paint the compound thumbnail.
+        """
+        node = self.node(index)
+        if node is None:
+            return []
+        return [
+            (scene, scene.record.thumbnail_url)
+            for scene in node.scene_nodes()
+            if scene.icon is None
+        ]
+
+    def thumbnail_changed(self, node):
+        """
+        Queues a scene whose thumbnail has arrived. The compound thumbnails
+        of its groups are updated once per event loop iteration, for all
+        the thumbnails received in it.
+        """
+        self._pending_thumbnails[node] = None
+        if not self._thumbnails_flush_scheduled:
+            self._thumbnails_flush_scheduled = True
+            QTimer.singleShot(0, self._flush_thumbnails)
+
+    def _flush_thumbnails(self):
+        self._thumbnails_flush_scheduled = False
+        scene_nodes = self._pending_thumbnails
+        self._pending_thumbnails = {}
+        changed = {}
+        for scene_node in scene_nodes:
+            if scene_node.model is not self:
+                continue
+            changed[scene_node] = None
+            parent = scene_node.parent
+            while parent is not None:
+                parent.compound.add_tile(scene_node.record.id, scene_node.icon)
+                changed[parent] = None
+                parent = parent.parent
+        for node in changed:
+            node.render_thumbnail()
+            index = self.index_for_node(node)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def _emit_data_changed_for_all(self):
+        if not self._date_nodes:
+            return
+        self.dataChanged.emit(
+            self.index(0, 0), self.index(len(self._date_nodes) - 1, 0)
+        )
+        for date_node in self._date_nodes:
+            self._emit_data_changed_for_children(date_node)
+
+    def _emit_data_changed_for_children(self, node):
+        if node.children:
+            parent = self.index_for_node(node)
+            self.dataChanged.emit(
+                self.index(0, 0, parent),
+                self.index(len(node.children) - 1, 0, parent),
+            )
+            for child in node.children:
+                self._emit_data_changed_for_children(child)
+
+    def _children(self, parent):
+        if not parent.isValid():
+            return self._date_nodes
+        return parent.internalPointer().children
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self._children(parent)[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._children(parent))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled
+        if index.internalPointer().downloadable:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.text()
+        elif role == Qt.CheckStateRole:
+            return node.check_state()
+        elif role == Qt.DecorationRole:
+            return node.icon
+        elif role == Qt.ToolTipRole:
+            return node.tooltip()
+        elif role == self.NodeRole:
+            return node
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        node = index.internalPointer()
+        if not node.downloadable:
+            return False
+        if not self._set_checked(node, value == Qt.Checked):
+            return True
+        self._emit_data_changed_for_children(node)
+        while index.isValid():
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            index = index.parent()
+        self.checkStateChanged.emit()
+        return True
+
+    def _set_checked(self, node, checked):
+        """
+        Checks or unchecks all the downloadable scenes under a node,
+        updating the counters of their groups and the set of checked
+        scenes. Returns the scenes whose state changed.
+        """
+        delta = 1 if checked else -1
+        changed = [
+            scene_node
+            for scene_node in node.scene_nodes()
+            if scene_node.downloadable and bool(scene_node.n_checked) != checked
+        ]
+        for scene_node in changed:
+            if checked:
+                self._checked[scene_node.record.id] = scene_node
+            else:
+                self._checked.pop(scene_node.record.id, None)
+            node = scene_node
+            while node is not None:
+                node.n_checked += delta
+                node = node.parent
+        return changed
+
+
+class DailyImagesResultsDelegate(QStyledItemDelegate):
+    """
+    Paints the rows of the daily imagery results tree, and handles clicks
+    on their checkbox and action icons.
+    """
+
+    zoomToRequested = pyqtSignal(object)
+    addPreviewRequested = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._document = QTextDocument()
+        self._document.setDocumentMargin(0)
+        self._placeholder = QPixmap(PLACEHOLDER_THUMB, "SVG").scaled(
+            THUMB_SIZE, THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation
+        )
+        icon_size = QSize(ICON_SIZE, ICON_SIZE)
+        self._lock_pixmap = LOCK_ICON.pixmap(QSize(LOCK_SIZE, LOCK_SIZE))
+        self._zoom_pixmap = ZOOMTO_ICON.pixmap(icon_size)
+        self._preview_pixmap = ADD_PREVIEW_ICON.pixmap(icon_size)
+        self._preview_disabled_pixmap = ADD_PREVIEW_ICON.pixmap(
+            icon_size, QIcon.Disabled
+        )
+
+    def item_layout(self, rect, node):
+        """
+        Returns the rectangles of the elements drawn for a node in a row
+        """
+        center = rect.center().y()
+        x = rect.left() + SPACING
+        checkbox = QRect(x, center - 8, 16, 16)
+        x = checkbox.right() + SPACING
+        if node.downloadable:
+            lock = QRect(x, center, 0, 0)
+        else:
+            lock = QRect(x, center - LOCK_SIZE // 2, LOCK_SIZE, LOCK_SIZE)
+            x = lock.right() + SPACING
+        thumbnail = QRect(x, center - THUMB_SIZE // 2, THUMB_SIZE, THUMB_SIZE)
+        right = rect.right() - 10
+        preview = QRect(
+            right - ICON_SIZE, center - ICON_SIZE // 2, ICON_SIZE, ICON_SIZE
+        )
+        zoom = preview.translated(-ICON_SIZE - SPACING, 0)
+        text_left = thumbnail.right() + SPACING
+        text = QRect(
+            text_left,
+            rect.top(),
+            max(0, zoom.left() - SPACING - text_left),
+            rect.height(),
+        )
+        return ItemLayout(checkbox, lock, thumbnail, text, zoom, preview)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        node = index.data(DailyImagesResultsModel.NodeRole)
+        if node is None:
+            return
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        widget = opt.widget
+        style = widget.style()
+        layout = self.item_layout(opt.rect, node)
+
+        painter.save()
+        try:
+            style.drawPrimitive(QStyle.PE_PanelItemViewItem, opt, painter, widget)
+            if opt.state & QStyle.State_MouseOver:
+                painter.setPen(QPen(PLANET_COLOR, 2))
+                painter.drawRect(opt.rect.adjusted(1, 1, -1, -1))
+
+            check = QStyleOptionButton()
+            check.rect = layout.checkbox
+            check.state = (
+                QStyle.State_Enabled if node.downloadable else QStyle.State_None
+            )
+            state = node.check_state()
+            if state == Qt.Checked:
+                check.state |= QStyle.State_On
+            elif state == Qt.PartiallyChecked:
+                check.state |= QStyle.State_NoChange
+            else:
+                check.state |= QStyle.State_Off
+            style.drawPrimitive(QStyle.PE_IndicatorCheckBox, check, painter, widget)
+
+            if not node.downloadable:
+                painter.drawPixmap(layout.lock, self._lock_pixmap)
+
+            thumb = node.icon or self._placeholder
+            target = QRect(0, 0, thumb.width(), thumb.height())
+            target.moveCenter(layout.thumbnail.center())
+            painter.drawPixmap(target, thumb)
+
+            self._document.setHtml(node.text())
+            self._document.setTextWidth(layout.text.width())
+            height = self._document.size().height()
+            painter.save()
+            painter.translate(layout.text.left(), layout.text.center().y() - height / 2)
+            self._document.drawContents(
+                painter, QRectF(0, 0, layout.text.width(), layout.text.height())
+            )
+            painter.restore()
+
+            painter.drawPixmap(layout.zoom, self._zoom_pixmap)
+            if node.can_preview():
+                painter.drawPixmap(layout.preview, self._preview_pixmap)
+            else:
+                painter.drawPixmap(layout.preview, self._preview_disabled_pixmap)
+        finally:
+            painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in [
+            QEvent.MouseButtonPress,
+            QEvent.MouseButtonRelease,
+            QEvent.MouseButtonDblClick,
+        ]:
+            return False
+        if event.button() != Qt.LeftButton:
+            return False
+        node = index.data(DailyImagesResultsModel.NodeRole)
+        layout = self.item_layout(option.rect, node)
+        pos = event.pos()
+        if layout.checkbox.contains(pos):
+            if event.type() == QEvent.MouseButtonRelease and node.downloadable:
+                state = (
+                    Qt.Checked if node.check_state() == Qt.Unchecked else Qt.Unchecked
+                )
+                model.setData(index, state, Qt.CheckStateRole)
+            return True
+        elif layout.zoom.contains(pos):
+            if event.type() == QEvent.MouseButtonRelease:
+                self.zoomToRequested.emit(node)
+            return True
+        elif layout.preview.contains(pos):
+            if event.type() == QEvent.MouseButtonRelease and node.can_preview():
+                self.addPreviewRequested.emit(node)
+            return True
+        return False
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() != QEvent.ToolTip:
+            return super().helpEvent(event, view, option, index)
+        node = index.data(DailyImagesResultsModel.NodeRole)
+        if node is None:
+            return False
+        layout = self.item_layout(option.rect, node)
+        if layout.zoom.contains(event.pos()):
+            text = ZOOM_TO_TOOLTIP
+        elif layout.preview.contains(event.pos()):
+            text = node.preview_tooltip()
+        else:
+            text = node.tooltip()
+        if text:
+            QToolTip.showText(event.globalPos(), text, view)
+        else:
+            QToolTip.hideText()
+        return True
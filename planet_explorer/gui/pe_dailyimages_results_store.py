@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    pe_dailyimages_results_store.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import json
+import math
+
+import iso8601
+import numpy as np
+
+ACQUIRED = "acquired"
+AREA_COVERAGE = "area_coverage"
+
+# Numeric item properties that can be filtered with a RangeFilter
+RANGE_FIELDS = [
+    "cloud_cover",
+    "sun_azimuth",
+    "sun_elevation",
+    "view_angle",
+    "gsd",
+    "anomalous_pixels",
+    "usable_data",
+]
+
+RANGE_FILTER_TYPES = ["RangeFilter", "DateRangeFilter"]
+
+INITIAL_CAPACITY = 1024
+
+
+class FilterRange:
+    """
+    Interval defined by the config of a range filter. Bounds can be
+    inclusive (gte/lte) or exclusive (gt/lt).
+    """
+
+    def __init__(
+        self, low=-math.inf, high=math.inf, low_strict=False, high_strict=False
+    ):
+        self.low = low
+        self.high = high
+        self.low_strict = low_strict
+        self.high_strict = high_strict
+
+    @staticmethod
+    def from_config(config, parse=float):
+        fr = FilterRange()
+        if "gte" in config:
+            fr.low = parse(config["gte"])
+        elif "gt" in config:
+            fr.low, fr.low_strict = parse(config["gt"]), True
+        if "lte" in config:
+            fr.high = parse(config["lte"])
+        elif "lt" in config:
+            fr.high, fr.high_strict = parse(config["lt"]), True
+        return fr
+
+    def intersect(self, other):
+        low, low_strict = max(
+            (self.low, self.low_strict), (other.low, other.low_strict)
+        )
+        high, high_inclusive = min(
+            (self.high, not self.high_strict), (other.high, not other.high_strict)
+        )
+        return FilterRange(low, high, low_strict, not high_inclusive)
+
+    def contains(self, other):
+        """
+        True if every value in the other range is also in this one
+        """
+        if other.low < self.low or (
+            other.low == self.low and self.low_strict and not other.low_strict
+        ):
+            return False
+        if other.high > self.high or (
+            other.high == self.high and self.high_strict and not other.high_strict
+        ):
+            return False
+        return True
+
+    def mask(self, values):
+        low = values > self.low if self.low_strict else values >= self.low
+        high = values < self.high if self.high_strict else values <= self.high
+        return low & high
+
+
+def _epoch(value):
+    return iso8601.parse_date(value).timestamp()
+
+
+def split_request(request):
+    """
+    Splits a search request into the range filters that can be evaluated
+    locally, as a dict of field name -> FilterRange, and a signature string
+    with everything else in the request.
+    """
+    request = dict(request or {})
+    filt = request.pop("filter", None)
+    ranges = {}
+    others = []
+    if filt is not None and filt.get("type") == "AndFilter":
+        for subfilter in filt["config"]:
+            field_name = subfilter.get("field_name")
+            if subfilter.get("type") in RANGE_FILTER_TYPES and (
+                field_name == ACQUIRED or field_name in RANGE_FIELDS
+            ):
+                parse = _epoch if field_name == ACQUIRED else float
+                fr = FilterRange.from_config(subfilter["config"], parse)
+                if field_name in ranges:
+                    fr = ranges[field_name].intersect(fr)
+                ranges[field_name] = fr
+            else:
+                others.append(subfilter)
+    elif filt is not None:
+        others.append(filt)
+    request["filter"] = sorted(json.dumps(f, sort_keys=True) for f in others)
+    return ranges, json.dumps(request, sort_keys=True)
+
+
+class DailyImagesResultsStore:
+    """
+    Columnar in-memory store for the scene records fetched for a search
+    request.
+
+    Once all the pages of a search have been fetched, requests that only
+    differ from it in tighter range filters can be answered locally, in
+    any sort order.
+    """
+
+    def __init__(self):
+        self.reset(None)
+
+    def reset(self, request):
+        self._ranges, self._signature = split_request(request)
+        self._records = []
+        self._size = 0
+        self._complete = False
+        self._columns = {
+            name: np.full(INITIAL_CAPACITY, np.nan)
+            for name in [ACQUIRED, AREA_COVERAGE] + RANGE_FIELDS
+        }
+
+    def __len__(self):
+        return self._size
+
+    def is_complete(self):
+        return self._complete
+
+    def set_complete(self, complete=True):
+        self._complete = complete
+
+    def append(self, records):
+        count = len(records)
+        if not count:
+            return
+        self._reserve(self._size + count)
+        start, end = self._size, self._size + count
+        self._columns[ACQUIRED][start:end] = [r.epoch for r in records]
+        for name in RANGE_FIELDS:
+            self._columns[name][start:end] = [
+                _float_or_nan(r.image["properties"].get(name)) for r in records
+            ]
+        self._records.extend(records)
+        self._size = end
+
+    def _reserve(self, size):
+        capacity = len(self._columns[ACQUIRED])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.full(capacity, np.nan)
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+
+    def can_refine(self, request):
+        """
+        True if the results of a request can be computed from the stored
+        ones, without querying the server
+        """
+        if not self._complete:
+            return False
+        ranges, signature = split_request(request)
+        if signature != self._signature:
+            return False
+        for name, fr in ranges.items():
+            if not self._ranges.get(name, FilterRange()).contains(fr):
+                return False
+        for name in self._ranges:
+            if name not in ranges:
+                return False
+        return True
+
+    def query(
+        self,
+        request,
+        ascending=False,
+        coverage_calculator=None,
+        coverage_range=None,
+    ):
+        """
+        Returns the stored records that match the range filters of a
+        request, and optionally an area coverage range, sorted by
+        acquisition date
+        """
+        ranges, _ = split_request(request)
+        mask = np.ones(self._size, dtype=bool)
+        for name, fr in ranges.items():
+            mask &= fr.mask(self._columns[name][: self._size])
+        if (
+            coverage_range is not None
+            and coverage_calculator is not None
+            and coverage_calculator.has_aoi()
+        ):
+            coverage = self._coverage(coverage_calculator, np.flatnonzero(mask))
+            mask &= coverage_range.mask(coverage)
+        indices = np.flatnonzero(mask)
+        epochs = self._columns[ACQUIRED][indices]
+        order = np.argsort(epochs if ascending else -epochs, kind="stable")
+        return [self._records[i] for i in indices[order]]
+
+    def _coverage(self, calculator, indices):
+        column = self._columns[AREA_COVERAGE]
+        missing = indices[np.isnan(column[indices])]
+        if len(missing):
+            records = [self._records[i] for i in missing]
+            column[missing] = calculator.coverages(
+                [r.image for r in records], [r.geom for r in records]
+            )
+        return column[: self._size]
+
+
+def _float_or_nan(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    pe_footprints.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+from collections import Counter
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsFeature,
+    QgsGeometry,
+    QgsProject,
+    QgsRectangle,
+    QgsSpatialIndex,
+    QgsWkbTypes,
+)
+from qgis.gui import QgsRubberBand
+from qgis.PyQt.QtCore import QObject, QTimer
+
+from ..pe_utils import iface
+
+# Styles showing more footprints than this only draw the ones
+# intersecting the visible extent of the canvas
+VISIBLE_EXTENT_THRESHOLD = 100
+
+
+class FootprintStyle:
+    def __init__(self, band):
+        self.band = band
+        self.keys = Counter()
+
+
+class FootprintOverlay(QObject):
+    """
+    Draws footprints on the map canvas by key, using one rubber band per
+    style instead of one (or more) per item.
+
+    Footprints are registered once in EPSG:4326 and kept in a spatial
+    index. Their geometries in the project CRS are cached, and the cache
+    is invalidated when the project CRS changes. Rubber bands are updated
+    once per event loop iteration, whatever the number of changes.
+    """
+
+    def __init__(self, canvas):
+        super().__init__()
+        self._canvas = canvas
+        self._geoms = {}
+        self._projected = {}
+        self._fids = {}
+        self._keys_by_fid = {}
+        self._next_fid = 1
+        self._index = QgsSpatialIndex()
+        self._transform = None
+        self._styles = {}
+        self._dirty = set()
+        QgsProject.instance().crsChanged.connect(self._crs_changed)
+        canvas.extentsChanged.connect(self._extent_changed)
+
+    def add_style(self, name, stroke_color, width=2, fill_color=None, brush_style=None):
+        if name in self._styles:
+            return
+        band = QgsRubberBand(self._canvas, QgsWkbTypes.PolygonGeometry)
+        band.setStrokeColor(stroke_color)
+        band.setWidth(width)
+        if fill_color is not None:
+            band.setFillColor(fill_color)
+        if brush_style is not None:
+            band.setBrushStyle(brush_style)
+        self._styles[name] = FootprintStyle(band)
+
+    def set_brush_style(self, name, brush_style):
+        band = self._styles[name].band
+        band.setBrushStyle(brush_style)
+        band.updateCanvas()
+
+    def add_footprint(self, key, geom):
+        """
+        :param key: Hashable identifier of the footprint
+        :param geom: Footprint in EPSG:4326
+        :type geom: QgsGeometry
+        """
+        if key in self._geoms:
+            return
+        fid = self._next_fid
+        self._next_fid += 1
+        self._geoms[key] = geom
+        self._fids[key] = fid
+        self._keys_by_fid[fid] = key
+        self._index.addFeature(fid, geom.boundingBox())
+
+    def remove_footprints(self, keys):
+        removed = False
+        for key in keys:
+            geom = self._geoms.pop(key, None)
+            if geom is None:
+                continue
+            fid = self._fids.pop(key)
+            del self._keys_by_fid[fid]
+            self._projected.pop(key, None)
+            feature = QgsFeature(fid)
+            feature.setGeometry(geom)
+            self._index.deleteFeature(feature)
+            for style in self._styles.values():
+                style.keys.pop(key, None)
+            removed = True
+        if removed:
+            self._refresh_all()
+
+    def show(self, name, keys):
+        style = self._styles[name]
+        style.keys.update(keys)
+        self._schedule_refresh(name)
+
+    def hide(self, name, keys):
+        style = self._styles[name]
+        style.keys.subtract(keys)
+        style.keys += Counter()  # drops keys with no count left
+        self._schedule_refresh(name)
+
+    def set_keys(self, name, keys):
+        style = self._styles[name]
+        style.keys = Counter(keys)
+        self._schedule_refresh(name)
+
+    def clear(self, name):
+        self.set_keys(name, [])
+
+    def extent(self, keys):
+        """
+        Returns the extent of a set of footprints in the project CRS
+        """
+        extent = QgsRectangle()
+        extent.setMinimal()
+        for key in keys:
+            geom = self._projected_geometry(key)
+            if geom is not None:
+                extent.combineExtentWith(geom.boundingBox())
+        return extent
+
+    def remove(self):
+        """
+        Removes the rubber bands from the canvas and stops following the
+        project and the canvas
+        """
+        QgsProject.instance().crsChanged.disconnect(self._crs_changed)
+        self._canvas.extentsChanged.disconnect(self._extent_changed)
+        for style in self._styles.values():
+            self._canvas.scene().removeItem(style.band)
+        self._styles = {}
+        self._dirty = set()
+
+    def _project_transform(self):
+        if self._transform is None:
+            self._transform = QgsCoordinateTransform(
+                QgsCoordinateReferenceSystem("EPSG:4326"),
+                QgsProject.instance().crs(),
+                QgsProject.instance(),
+            )
+        return self._transform
+
+    def _projected_geometry(self, key):
+        geom = self._projected.get(key)
+        if geom is None and key in self._geoms:
+            geom = QgsGeometry(self._geoms[key])
+            geom.transform(self._project_transform())
+            self._projected[key] = geom
+        return geom
+
+    def _visible_keys(self):
+        try:
+            extent = self._project_transform().transformBoundingBox(
+                self._canvas.extent(), QgsCoordinateTransform.ReverseTransform
+            )
+        except Exception:
+            return None
+        return {self._keys_by_fid[fid] for fid in self._index.intersects(extent)}
+
+    def _refresh(self, style):
+        keys = style.keys.keys()
+        if len(keys) > VISIBLE_EXTENT_THRESHOLD:
+            visible = self._visible_keys()
+            if visible is not None:
+                keys = [k for k in keys if k in visible]
+        geoms = [self._projected_geometry(k) for k in keys]
+        geoms = [g for g in geoms if g is not None]
+        if geoms:
+            style.band.setToGeometry(QgsGeometry.collectGeometry(geoms))
+        else:
+            style.band.reset(QgsWkbTypes.PolygonGeometry)
+
+    def _schedule_refresh(self, name):
+        if not self._dirty:
+            QTimer.singleShot(0, self._flush)
+        self._dirty.add(name)
+
+    def _flush(self):
+        dirty = self._dirty
+        self._dirty = set()
+        for name in dirty:
+            self._refresh(self._styles[name])
+
+    def _refresh_all(self):
+        for name in self._styles:
+            self._schedule_refresh(name)
+
+    def _crs_changed(self):
+        self._transform = None
+        self._projected = {}
+        self._refresh_all()
+
+    def _extent_changed(self):
+        for name, style in self._styles.items():
+            if len(style.keys) > VISIBLE_EXTENT_THRESHOLD:
+                self._schedule_refresh(name)
+
+
+_footprint_overlay = None
+
+
+def footprint_overlay():
+    global _footprint_overlay
+    if _footprint_overlay is None:
+        _footprint_overlay = FootprintOverlay(iface.mapCanvas())
+    return _footprint_overlay
+
+
+def remove_footprint_overlay():
+    global _footprint_overlay
+    if _footprint_overlay is not None:
+        _footprint_overlay.remove()
+        _footprint_overlay = None
@@ -394,11 +394,8 @@ class PlanetOrderItemTypeWidget(QWidget):
                 bundles.append(bundle)
         return bundles
 
-    def set_thumbnail(self, img):
-        thumbnail = QPixmap(img)
-        self.thumbnails.append(
-            thumbnail.scaled(96, 96, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        )
+    def set_thumbnail(self, thumbnail):
+        self.thumbnails.append(QPixmap.fromImage(thumbnail.large))
 
         if len(self.images) == len(self.thumbnails):
             bboxes = [img[GEOMETRY] for img in self.images]
@@ -444,12 +441,9 @@ class ImageReviewWidget(QFrame):
     def selected(self):
         return self.checkBox.isChecked()
 
-    def set_thumbnail(self, img):
-        self.thumbnail = QPixmap(img)
-        thumb = self.thumbnail.scaled(
-            96, 96, Qt.KeepAspectRatio, Qt.SmoothTransformation
-        )
-        self.label.setPixmap(thumb)
+    def set_thumbnail(self, thumbnail):
+        self.thumbnail = QPixmap.fromImage(thumbnail.large)
+        self.label.setPixmap(self.thumbnail)
 
 
 class PlanetOrderReviewWidget(QWidget):
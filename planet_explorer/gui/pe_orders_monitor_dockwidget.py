@@ -23,7 +23,6 @@ __revision__ = "$Format:%H$"
 
 import logging
 import os
-import json
 
 import iso8601
 from planet.api.models import Order, Orders
@@ -46,15 +45,27 @@ from qgis.PyQt.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QListWidgetItem,
+    QMenu,
     QMessageBox,
     QPushButton,
+    QToolButton,
     QVBoxLayout,
     QWidget,
 )
 
 from ..pe_utils import orders_download_folder, iface, user_agent
 from ..planet_api import PlanetClient
-from ..planet_api.p_order_tasks import OrderProcessorTask, QuadsOrderProcessorTask
+from ..planet_api.p_band_stats import (
+    CUMULATIVE_CUT_LOWER,
+    CUMULATIVE_CUT_UPPER,
+    read_band_stats,
+)
+from ..planet_api.p_mosaics import manifest_rasters
+from ..planet_api.p_order_tasks import (
+    OrderMosaicTask,
+    OrderProcessorTask,
+    QuadsOrderProcessorTask,
+)
 from ..planet_api.p_quad_orders import quad_orders
 from .pe_gui_utils import waitcursor
 
@@ -251,8 +262,17 @@ class OrderItemWidget(QWidget):
         hlayout = QHBoxLayout()
         hlayout.addWidget(button)
 
-        add_to_map_btn = QPushButton("Add to map")
-        add_to_map_btn.clicked.connect(self.add_to_map)
+        add_to_map_btn = QToolButton()
+        add_to_map_btn.setText("Add to map")
+        add_to_map_btn.setPopupMode(QToolButton.MenuButtonPopup)
+        add_to_map_btn.clicked.connect(lambda: self.add_to_map())
+        add_to_map_menu = QMenu(add_to_map_btn)
+        add_mosaics_action = add_to_map_menu.addAction("Add as mosaic")
+        add_mosaics_action.setToolTip(
+            "Add the order as one mosaic per item type and asset type"
+        )
+        add_mosaics_action.triggered.connect(lambda: self.add_mosaics_to_map())
+        add_to_map_btn.setMenu(add_to_map_menu)
         hlayout.addWidget(add_to_map_btn)
 
         if order.downloaded():
@@ -298,7 +318,8 @@ class OrderItemWidget(QWidget):
             ret = QMessageBox.question(
                 self,
                 "Download order",
-                "This order is already downloaded.\nDownload again?",
+                "This order is already downloaded.\n"
+                "Check it and download any missing files?",
             )
             if ret == QMessageBox.No:
                 return
@@ -336,6 +357,13 @@ class OrderItemWidget(QWidget):
                 return i
         return default
 
+    def _cumulative_cut(self, layer, band, stats):
+        if stats is not None and 0 < band <= len(stats):
+            return stats[band - 1]
+        return layer.dataProvider().cumulativeCut(
+            band, CUMULATIVE_CUT_LOWER, CUMULATIVE_CUT_UPPER, sampleSize=10000
+        )
+
     def load_layer(self, layer):
         """Adds the provided QgsRasterLayer to the QGIS map.
         Rasters with less than 3 bands will be added as
@@ -345,6 +373,10 @@ class OrderItemWidget(QWidget):
         :type layer: QgsRasterLayer
         """
 
+        # Statistics computed in the background after the order was
+        # downloaded, if any
+        stats = read_band_stats(layer.source())
+
         band_cnt = layer.bandCount()
         if band_cnt < 3:
 
@@ -362,9 +394,7 @@ class OrderItemWidget(QWidget):
             enhancement.setContrastEnhancementAlgorithm(
                 QgsContrastEnhancement.StretchToMinimumMaximum, True
             )
-            band_min, band_max = layer.dataProvider().cumulativeCut(
-                used_bands[0], 0.02, 0.98, sampleSize=10000
-            )
+            band_min, band_max = self._cumulative_cut(layer, used_bands[0], stats)
             enhancement.setMinimumValue(band_min)
             enhancement.setMaximumValue(band_max)
             r.setContrastEnhancement(enhancement)
@@ -385,9 +415,7 @@ class OrderItemWidget(QWidget):
                 enhancement.setContrastEnhancementAlgorithm(
                     QgsContrastEnhancement.StretchToMinimumMaximum, True
                 )
-                band_min, band_max = layer.dataProvider().cumulativeCut(
-                    used_bands[b], 0.02, 0.98, sampleSize=10000
-                )
+                band_min, band_max = self._cumulative_cut(layer, used_bands[b], stats)
                 enhancement.setMinimumValue(band_min)
                 enhancement.setMaximumValue(band_max)
                 if b == 0:
@@ -400,73 +428,73 @@ class OrderItemWidget(QWidget):
             layer.setRenderer(r)
             QgsProject.instance().addMapLayer(layer)
 
-    def add_to_map(self):
-        """Called when the add to map button is clicked.
-        Adds the selected remotely sensed image in the order monitor list to QGIS.
-        The data needs to be downloaded.
+    def _manifest_rasters(self):
+        """
+        Returns the downloaded rasters listed in the manifest.json files of
+        the order, or None if there are none
         """
-
-        # Gets the folder name in the root folder to access the manifest.json file
-        # There should always be only one folder, so this will be the selected folder
-        # All files will be ignored
-        final_path = None
         root = self.order.download_folder()
-        dir_contents = os.listdir(root)
-        for content in dir_contents:
-            full_path = os.path.join(root, content)
-            if os.path.isdir(full_path):
-                final_path = full_path
-                break
-
-        manifest_dir = "{}/{}".format(final_path, "manifest.json")
-
-        data_found = False
-        if os.path.exists(manifest_dir):
-            manifest_file = open(manifest_dir)
-            manifest_data = json.load(manifest_file)
-
-            list_files = manifest_data["files"]
-            for json_file in list_files:
-                media_type = json_file["media_type"]
-                raster_types = ["image/tiff", "application/vnd.lotus-notes"]
-
-                if media_type in raster_types:
-                    annotations = json_file["annotations"]
-                    asset_type_key = "planet/asset_type"
-
-                    if asset_type_key in annotations:
-                        asset_type = annotations[asset_type_key]
-                        if asset_type.endswith("_udm") or asset_type.endswith("_udm2"):
-                            # Skips all 'udm' asset rasters
-                            continue
-                    else:
-                        # A workaround for composite
-                        image_path = json_file["path"]
-                        if not image_path.endswith(
-                            "composite.tif"
-                        ) and not image_path.endswith("composite_file_format.ntf"):
-                            # Skips if it's not a composite file
-                            continue
-
-                    image_path = json_file["path"]
-                    image_dir = "{}/{}".format(final_path, image_path)
-
-                    if os.path.exists(image_dir):
-                        layer = QgsRasterLayer(image_dir, os.path.basename(image_dir))
-                        self.load_layer(layer)
-                        data_found = True
-            if not data_found:
-                # The raster(s) specified in the manifest.json file is missing
-                self.qgs_error_message(
-                    "Cannot add data to map", "Image layer(s) is missing"
+        manifest_found = False
+        rasters = []
+        for content in sorted(os.listdir(root)):
+            manifest_file = os.path.join(root, content, "manifest.json")
+            if os.path.exists(manifest_file):
+                manifest_found = True
+                rasters.extend(
+                    r for r in manifest_rasters(manifest_file) if os.path.exists(r.path)
                 )
-            # True returned if atleast one data were loaded, otherwise False
-            return data_found
-        else:
+        if not manifest_found:
             # The manifest.json file is missing
             # This file contains information on the downloaded data
             self.qgs_error_message("Cannot add data to map", "Manifest file is missing")
+            return None
+        if not rasters:
+            # The raster(s) specified in the manifest.json file is missing
+            self.qgs_error_message(
+                "Cannot add data to map", "Image layer(s) is missing"
+            )
+            return None
+        return rasters
+
+    def add_to_map(self):
+        """Called when the add individual scenes action is selected.
+        Adds each remotely sensed image of the selected order in the order
+        monitor list to QGIS as a separate layer.
+        The data needs to be downloaded.
+        """
+        rasters = self._manifest_rasters()
+        if rasters is None:
+            return False
+        for raster in rasters:
+            layer = QgsRasterLayer(raster.path, os.path.basename(raster.path))
+            self.load_layer(layer)
+        # True returned if atleast one data were loaded, otherwise False
+        return True
+
+    def add_mosaics_to_map(self):
+        """Called when the add to map button is clicked.
+        Adds the images of the selected order to QGIS as one mosaic layer per
+        item type and asset type, built in a background task.
+        The data needs to be downloaded.
+        """
+        rasters = self._manifest_rasters()
+        if rasters is None:
             return False
+        task = OrderMosaicTask(self.order, rasters)
+        task.taskCompleted.connect(lambda: self._mosaics_built(task))
+        QgsApplication.taskManager().addTask(task)
+        self.mosaic_task = task
+        iface.messageBar().pushMessage(
+            "",
+            "Mosaic building task added to QGIS task manager",
+            level=Qgis.Info,
+            duration=5,
+        )
+        return True
+
+    def _mosaics_built(self, task):
+        for path, name in task.mosaics:
+            self.load_layer(QgsRasterLayer(path, name))
 
     def qgs_error_message(self, error_title="Error", error_desciption=""):
         """Displays an error message on the QGIS message bar.
@@ -549,7 +577,8 @@ class QuadsOrderItemWidget(QWidget):
             ret = QMessageBox.question(
                 self,
                 "Download order",
-                "This order is already downloaded.\nDownload again?",
+                "This order is already downloaded.\n"
+                "Download only the quads that are new or have changed?",
             )
             if ret == QMessageBox.No:
                 return
@@ -36,19 +36,17 @@ from qgis.PyQt.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from qgis.core import QgsGeometry, QgsWkbTypes
-from qgis.gui import QgsRubberBand
+from qgis.core import QgsGeometry, QgsRectangle
 
 from ..pe_utils import (
     LINKS,
     NAME,
     QUADS_AOI_BODY_COLOR,
     QUADS_AOI_COLOR,
-    iface,
     mosaic_title,
-    qgsrectangle_for_canvas_from_4326_bbox_coords,
 )
-from .pe_thumbnails import download_thumbnail
+from .pe_footprints import footprint_overlay
+from .pe_thumbnails import ViewportThumbnailLoader
 
 ID = "id"
 THUMBNAIL = "thumbnail"
@@ -57,6 +55,35 @@ BBOX = "bbox"
 
 PLACEHOLDER_THUMB = ":/plugins/planet_explorer/thumb-placeholder-128.svg"
 
+QUADS_FOOTPRINT = "quads"
+CHECKED_QUADS_FOOTPRINT = "quads_checked"
+HOVER_QUADS_FOOTPRINT = "quads_hover"
+QUADS_FOOTPRINT_STYLES = [
+    QUADS_FOOTPRINT,
+    CHECKED_QUADS_FOOTPRINT,
+    HOVER_QUADS_FOOTPRINT,
+]
+
+
+def quads_footprint_overlay():
+    overlay = footprint_overlay()
+    overlay.add_style(QUADS_FOOTPRINT, QUADS_AOI_COLOR, width=2)
+    overlay.add_style(
+        CHECKED_QUADS_FOOTPRINT,
+        QUADS_AOI_COLOR,
+        width=2,
+        fill_color=QUADS_AOI_COLOR,
+        brush_style=Qt.BDiagPattern,
+    )
+    overlay.add_style(
+        HOVER_QUADS_FOOTPRINT,
+        QUADS_AOI_BODY_COLOR,
+        width=0,
+        fill_color=QUADS_AOI_BODY_COLOR,
+        brush_style=Qt.SolidPattern,
+    )
+    return overlay
+
 
 class QuadsTreeWidget(QTreeWidget):
 
@@ -72,6 +99,9 @@ class QuadsTreeWidget(QTreeWidget):
         self.setSelectionMode(self.NoSelection)
         self.widgets = {}
         self._updating = False
+        self._thumbnails_loader = ViewportThumbnailLoader(
+            self, self._thumbnail_requests
+        )
 
     def quad_widgets(self):
         all_widgets = []
@@ -80,11 +110,22 @@ class QuadsTreeWidget(QTreeWidget):
         return all_widgets
 
     def clear(self):
-        for w in self.quad_widgets():
-            w.remove_footprint()
+        overlay = quads_footprint_overlay()
+        for name in QUADS_FOOTPRINT_STYLES:
+            overlay.clear(name)
+        overlay.remove_footprints([w.footprint_key for w in self.quad_widgets()])
+        self._thumbnails_loader.clear()
         self.widgets = {}
         super().clear()
 
+    def _thumbnail_requests(self, index):
+        item = self.itemFromIndex(index)
+        if isinstance(item, QuadInstanceTreeItem):
+            widget = self.itemWidget(item, 0)
+            if widget is not None and not widget.has_thumbnail:
+                return [(widget, widget.quad[LINKS][THUMBNAIL])]
+        return []
+
     def show_footprints(self):
         for w in self.quad_widgets():
             w.show_footprint()
@@ -261,63 +302,62 @@ class QuadInstanceItemWidget(QFrame):
         layout.addStretch()
         self.setLayout(layout)
 
-        download_thumbnail(quad[LINKS][THUMBNAIL], self)
+        self.has_thumbnail = False
 
-        self.footprint = QgsRubberBand(iface.mapCanvas(), QgsWkbTypes.PolygonGeometry)
-        self.footprint.setFillColor(QUADS_AOI_COLOR)
-        self.footprint.setStrokeColor(QUADS_AOI_COLOR)
-        self.footprint.setWidth(2)
-
-        self.footprintfill = QgsRubberBand(
-            iface.mapCanvas(), QgsWkbTypes.PolygonGeometry
-        )
-        self.footprintfill.setFillColor(QUADS_AOI_BODY_COLOR)
-        self.footprintfill.setWidth(0)
+        self.footprint_key = ("quad", quad[ID])
+        self.geom = QgsGeometry.fromRect(QgsRectangle(*quad[BBOX]))
+        quads_footprint_overlay().add_footprint(self.footprint_key, self.geom)
+        self._footprint_visible = False
+        self._footprint_checked = False
 
         self.update_footprint_brush()
-        self.hide_solid_interior()
         self.show_footprint()
 
         self.setStyleSheet("QuadInstanceItemWidget{border: 2px solid transparent;}")
 
-    def set_thumbnail(self, img):
-        pixmap = QPixmap(img)
-        thumb = pixmap.scaled(48, 48, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.iconLabel.setPixmap(thumb)
+    def set_thumbnail(self, thumbnail):
+        self.iconLabel.setPixmap(QPixmap.fromImage(thumbnail.small))
         self.iconLabel.setStyleSheet("")
+        self.has_thumbnail = True
 
     def check_box_state_changed(self):
         self.update_footprint_brush()
         self.quadSelected.emit()
 
     def show_footprint(self):
-        coords = self.quad[BBOX]
-        extent = qgsrectangle_for_canvas_from_4326_bbox_coords(coords)
-        self.geom = QgsGeometry.fromRect(extent)
-        self.footprint.setToGeometry(self.geom)
-        self.footprintfill.setToGeometry(self.geom)
+        if not self._footprint_visible:
+            self._footprint_visible = True
+            quads_footprint_overlay().show(QUADS_FOOTPRINT, [self.footprint_key])
+            self.update_footprint_brush()
 
     def hide_footprint(self):
-        self.footprint.reset(QgsWkbTypes.PolygonGeometry)
-        self.footprintfill.reset(QgsWkbTypes.PolygonGeometry)
+        if self._footprint_visible:
+            self._footprint_visible = False
+            overlay = quads_footprint_overlay()
+            overlay.hide(QUADS_FOOTPRINT, [self.footprint_key])
+            overlay.hide(HOVER_QUADS_FOOTPRINT, [self.footprint_key])
+            self.update_footprint_brush()
 
     def show_solid_interior(self):
-        self.footprintfill.setBrushStyle(Qt.SolidPattern)
-        self.footprintfill.updateCanvas()
+        if self._footprint_visible:
+            quads_footprint_overlay().set_keys(
+                HOVER_QUADS_FOOTPRINT, [self.footprint_key]
+            )
 
     def hide_solid_interior(self):
-        self.footprintfill.setBrushStyle(Qt.NoBrush)
-        self.footprintfill.updateCanvas()
+        quads_footprint_overlay().clear(HOVER_QUADS_FOOTPRINT)
 
     def update_footprint_brush(self):
-        self.footprint.setBrushStyle(
-            Qt.BDiagPattern if self.checkBox.isChecked() else Qt.NoBrush
-        )
-        self.footprint.updateCanvas()
-
-    def remove_footprint(self):
-        iface.mapCanvas().scene().removeItem(self.footprint)
-        iface.mapCanvas().scene().removeItem(self.footprintfill)
+        # the checked hatch is only drawn while the footprint is visible
+        checked = self._footprint_visible and self.checkBox.isChecked()
+        if checked == self._footprint_checked:
+            return
+        self._footprint_checked = checked
+        overlay = quads_footprint_overlay()
+        if checked:
+            overlay.show(CHECKED_QUADS_FOOTPRINT, [self.footprint_key])
+        else:
+            overlay.hide(CHECKED_QUADS_FOOTPRINT, [self.footprint_key])
 
     def isSelected(self):
         return self.checkBox.isChecked()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    pe_thumbnail_cache.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Query parameters that identify the user, not the image
+PRIVATE_QUERY_PARAMS = ["api_key"]
+
+
+def thumbnail_cache_key(url):
+    """
+    Returns a key identifying the image behind a thumbnail URL, so the same
+    item and asset map to the same key whatever the credentials used.
+    """
+    parts = urlsplit(url)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query) if k not in PRIVATE_QUERY_PARAMS
+    )
+    key = f"{parts.netloc}{parts.path}"
+    if query:
+        key = f"{key}?{urlencode(query)}"
+    return key
+
+
+class MemoryLRUCache:
+    """
+    In-memory cache that evicts the least recently used values once the
+    sum of their costs exceeds a budget
+    """
+
+    def __init__(self, max_cost):
+        self.max_cost = max_cost
+        self._entries = OrderedDict()
+        self._cost = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def cost(self):
+        return self._cost
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, cost):
+        if key in self._entries:
+            self._cost -= self._entries.pop(key)[1]
+        if cost > self.max_cost:
+            return
+        self._entries[key] = (value, cost)
+        self._cost += cost
+        while self._cost > self.max_cost:
+            _, (_, evicted_cost) = self._entries.popitem(last=False)
+            self._cost -= evicted_cost
+
+    def clear(self):
+        self._entries.clear()
+        self._cost = 0
+
+
+class DiskLRUCache:
+    """
+    Cache of raw files in a folder, limited to a total size in bytes.
+
+    Recency is kept in the modification time of the files, so the least
+    recently used ones are evicted first across sessions too. The folder
+    is only scanned the first time the cache is used.
+
+    It can be used from several threads, so the scan and the file reads
+    and writes can be kept off the GUI thread.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._entries = None
+        self._size = 0
+        self._lock = threading.RLock()
+
+    def _filename(self, key):
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        self._size = 0
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            files = []
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, entry.name, stat.st_size))
+        except OSError:
+            return
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+
+    def size(self):
+        with self._lock:
+            self._load()
+            return self._size
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            self._load()
+            return self._filename(key) in self._entries
+
+    def get(self, key):
+        """
+        Returns the cached data for a key, or None if it is not cached
+        """
+        with self._lock:
+            self._load()
+            name = self._filename(key)
+            if name not in self._entries:
+                return None
+            path = os.path.join(self.folder, name)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                self._size -= self._entries.pop(name)
+                return None
+            self._entries.move_to_end(name)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._load()
+            if len(data) > self.max_bytes:
+                return
+            name = self._filename(key)
+            path = os.path.join(self.folder, name)
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError:
+                return
+            if name in self._entries:
+                self._size -= self._entries.pop(name)
+            self._entries[name] = len(data)
+            self._size += len(data)
+            self._evict()
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            if self._entries is not None:
+                self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._load()
+            self.max_bytes, max_bytes = 0, self.max_bytes
+            self._evict()
+            self.max_bytes = max_bytes
@@ -22,97 +22,570 @@ __copyright__ = "(C) 2019 Planet Inc, https://planet.com"
 # This will get replaced with a git SHA1 when you do a git archive
 __revision__ = "$Format:%H$"
 
-from collections import defaultdict
+import heapq
+import itertools
+import os
+import weakref
+from collections import Counter, namedtuple
+from functools import partial
 
 from qgis.PyQt.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
-from qgis.core import QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsProject
-from qgis.PyQt.QtCore import Qt, QUrl
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsProject,
+)
+from qgis.PyQt.QtCore import (
+    QEvent,
+    QObject,
+    QPoint,
+    QRunnable,
+    QSettings,
+    Qt,
+    QThreadPool,
+    QTimer,
+    QUrl,
+    pyqtSignal,
+)
 from qgis.PyQt.QtGui import QImage, QPainter, QPixmap
 
-from ..pe_utils import qgsgeometry_from_geojson
+from ..pe_utils import (
+    DEFAULT_THUMBNAIL_CACHE_SIZE,
+    SETTINGS_NAMESPACE,
+    THUMBNAIL_CACHE_SIZE_SETTING,
+    qgsgeometry_from_geojson,
+)
+from .pe_thumbnail_cache import DiskLRUCache, MemoryLRUCache, thumbnail_cache_key
+
+# Budget for the decoded thumbnails kept in memory
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+
+SMALL_THUMBNAIL_SIZE = 48
+LARGE_THUMBNAIL_SIZE = 96
+
+DECODE_THREADS = 2
+
+# Decoded thumbnail, as ready to use images of at most 48 and 96 pixels
+Thumbnail = namedtuple("Thumbnail", ["small", "large"])
+
+
+def _scaled(img, size):
+    return img.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+class ThumbnailDecodeTask(QRunnable):
+    """
+    Decodes an encoded thumbnail and scales it to the sizes used by the
+    widgets, outside the GUI thread.
+
+    Without data, the thumbnail is read from the disk cache first, and
+    downloaded thumbnails are saved to it once decoded, so the GUI thread
+    never waits for the disk.
+    """
+
+    def __init__(self, decoder, key, data, source, disk_cache):
+        super().__init__()
+        self.decoder = decoder
+        self.key = key
+        self.data = data
+        self.source = source
+        self.disk_cache = disk_cache
+
+    def run(self):
+        thumbnail = None
+        data = self.data
+        try:
+            if data is None:
+                data = self.disk_cache.get(self.key)
+            img = QImage()
+            if data is not None and img.loadFromData(data):
+                thumbnail = Thumbnail(
+                    _scaled(img, SMALL_THUMBNAIL_SIZE),
+                    _scaled(img, LARGE_THUMBNAIL_SIZE),
+                )
+                if self.source == "network":
+                    self.disk_cache.set_max_bytes(_disk_cache_max_bytes())
+                    self.disk_cache.put(self.key, data)
+        except Exception:
+            pass
+        self.decoder.decoded.emit(self.key, thumbnail, data, self.source)
+
+
+class ThumbnailDecoder(QObject):
+    """
+    Runs ThumbnailDecodeTasks in a thread pool and signals the results
+    back in the thread it lives in
+    """
+
+    decoded = pyqtSignal(str, object, object, str)
+
+    def __init__(self):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(DECODE_THREADS)
+
+    def decode(self, key, data, source, disk_cache):
+        """
+        Decodes a thumbnail, reading it from the disk cache if data is None
+        """
+        self.pool.start(ThumbnailDecodeTask(self, key, data, source, disk_cache))
+
+
+def _thumbnails_folder():
+    return os.path.join(
+        os.path.dirname(QgsApplication.qgisUserDatabaseFilePath()),
+        "planetexplorer",
+        "thumbnails",
+    )
+
+
+def _disk_cache_max_bytes():
+    try:
+        size_mb = float(
+            QSettings().value(
+                f"{SETTINGS_NAMESPACE}/{THUMBNAIL_CACHE_SIZE_SETTING}",
+                DEFAULT_THUMBNAIL_CACHE_SIZE,
+            )
+        )
+    except (TypeError, ValueError):
+        size_mb = DEFAULT_THUMBNAIL_CACHE_SIZE
+    return max(0, int(size_mb * 1024 * 1024))
+
+
+# Thumbnails downloaded at the same time, at most
+MAX_CONCURRENT_DOWNLOADS = 6
+
+# Request priorities. Lower values are downloaded first, and requests with
+# the same priority in the order they were made.
+VISIBLE_PRIORITY = 0
+NEAR_VIEWPORT_PRIORITY = 1
+BACKGROUND_PRIORITY = 2
+
+# Failed downloads are retried this many times, waiting RETRY_DELAY ms
+# before the first retry and doubling the wait for every following one
+MAX_RETRIES = 3
+RETRY_DELAY = 500
+
+# HTTP status codes worth retrying. Other 4xx codes won't change on retry.
+RETRY_HTTP_STATUS = [408, 429, 500, 502, 503, 504]
 
 
 class ThumbnailManager:
+    """
+    Downloads thumbnails and caches them in memory and on disk.
+
+    Thumbnails are cached by a key derived from their URL without the
+    api_key, so they survive credential changes and QGIS restarts. Cache
+    hits are served without touching the network.
+
+    Downloads are queued by priority and at most MAX_CONCURRENT_DOWNLOADS
+    run at the same time. All the widgets waiting for the same key share
+    a single download, which is aborted once none of them waits for it
+    anymore. Widgets are only weakly referenced, so a widget that gets
+    deleted stops waiting.
+
+    The disk cache is read and written, and thumbnails decoded and
+    scaled, in a thread pool. Widgets receive a Thumbnail with images ready to draw, and only those
+    small images are kept in memory.
+    """
+
     def __init__(self):
         self.nam = QNetworkAccessManager()
         self.nam.finished.connect(self.thumbnail_downloaded)
-        self.thumbnails = {}
-        self.widgets = defaultdict(list)
+        self.thumbnails = MemoryLRUCache(MEMORY_CACHE_BYTES)
+        self.disk_cache = DiskLRUCache(_thumbnails_folder(), _disk_cache_max_bytes())
+        # key -> {widget: priority}
+        self.widgets = {}
+        self._widget_keys = weakref.WeakKeyDictionary()
+        self._urls = {}
+        self._queue = []
+        self._queued = {}
+        self._replies = {}
+        self._retries = {}
+        self._decoding = set()
+        self.decoder = ThumbnailDecoder()
+        self.decoder.decoded.connect(self._thumbnail_decoded)
+        self._sequence = itertools.count()
+        self._stats = Counter()
+
+    def stats(self):
+        """
+        Returns counters of the thumbnails served from the memory cache
+        (memory_hits), from the disk cache (disk_hits) or that had to be
+        downloaded (misses), plus the downloads that were retried, failed
+        or were cancelled, and those currently queued or in flight.
+        """
+        stats = {
+            name: self._stats[name]
+            for name in [
+                "memory_hits",
+                "disk_hits",
+                "misses",
+                "downloads",
+                "retries",
+                "failures",
+                "cancelled",
+            ]
+        }
+        stats["queued"] = len(self._queued)
+        stats["in_flight"] = len(self._replies)
+        return stats
+
+    def download_thumbnail(self, url, widget, priority=BACKGROUND_PRIORITY):
+        key = thumbnail_cache_key(url)
+        thumbnail = self.thumbnails.get(key)
+        if thumbnail is not None:
+            self._stats["memory_hits"] += 1
+            self.cancel(widget)
+            widget.set_thumbnail(thumbnail)
+            return
+        if self._widget_keys.get(widget, key) != key:
+            self.cancel(widget)
+        if key not in self.widgets:
+            self.widgets[key] = weakref.WeakKeyDictionary()
+        self._widget_keys[widget] = key
+        self.widgets[key][widget] = priority
+        self._urls[key] = url
+        if key in self._decoding or key in self._replies or key in self._retries:
+            return
+        # the disk cache is read in the decoder threads, and the thumbnail
+        # downloaded if it is not there
+        self._decoding.add(key)
+        self.decoder.decode(key, None, "disk", self.disk_cache)
+
+    def cancel(self, widget):
+        """
+        Stops waiting for the thumbnail requested for a widget
+        """
+        key = self._widget_keys.pop(widget, None)
+        if key is None:
+            return
+        widgets = self.widgets.get(key, {})
+        widgets.pop(widget, None)
+        if widgets:
+            if key in self._queued:
+                self._enqueue(key)
+            return
+        self._stats["cancelled"] += 1
+        self._forget(key)
+        reply = self._replies.pop(key, None)
+        if reply is not None:
+            reply.abort()
+            self._start_downloads()
+
+    def _forget(self, key):
+        self.widgets.pop(key, None)
+        self._queued.pop(key, None)
+        self._urls.pop(key, None)
+        self._retries.pop(key, None)
+
+    def _enqueue(self, key):
+        priority = min(self.widgets[key].values())
+        if self._queued.get(key) != priority:
+            self._queued[key] = priority
+            heapq.heappush(self._queue, (priority, next(self._sequence), key))
+
+    def _start_downloads(self):
+        while self._queue and len(self._replies) < MAX_CONCURRENT_DOWNLOADS:
+            priority, _, key = heapq.heappop(self._queue)
+            if self._queued.get(key) != priority:
+                continue  # stale entry for a cancelled or reprioritized key
+            del self._queued[key]
+            if not self.widgets.get(key):
+                # every widget waiting for it has been deleted
+                self._forget(key)
+                continue
+            request = QNetworkRequest(QUrl(self._urls[key]))
+            request.setAttribute(QNetworkRequest.User, key)
+            self._replies[key] = self.nam.get(request)
+            self._stats["downloads"] += 1
+
+    def _can_retry(self, key, reply):
+        if self._retries.get(key, 0) >= MAX_RETRIES:
+            return False
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        return status is None or status in RETRY_HTTP_STATUS
 
-    def download_thumbnail(self, url, widget):
-        if url in self.thumbnails:
-            widget.set_thumbnail(self.thumbnails[url])
+    def _retry(self, key):
+        attempt = self._retries.get(key, 0)
+        self._retries[key] = attempt + 1
+        self._stats["retries"] += 1
+        QTimer.singleShot(
+            RETRY_DELAY * 2**attempt, partial(self._retry_timeout, key, attempt + 1)
+        )
+
+    def _retry_timeout(self, key, attempt):
+        if self._retries.get(key) != attempt:
+            return  # cancelled while waiting
+        if self.widgets.get(key):
+            self._enqueue(key)
+            self._start_downloads()
         else:
-            self.widgets[url].append(widget)
-            self.nam.get(QNetworkRequest(QUrl(url)))
+            self._forget(key)
 
     def thumbnail_downloaded(self, reply):
+        reply.deleteLater()
+        key = reply.request().attribute(QNetworkRequest.User)
+        if self._replies.get(key) is not reply:
+            return  # aborted
+        del self._replies[key]
         if reply.error() == QNetworkReply.NoError:
-            url = reply.url().toString()
-            img = QImage()
-            img.loadFromData(reply.readAll())
-            self.thumbnails[url] = img
-            for w in self.widgets[url]:
-                try:
-                    w.set_thumbnail(img)
-                except Exception:
-                    # the widget might have been deleted
-                    pass
+            self._decoding.add(key)
+            self.decoder.decode(key, bytes(reply.readAll()), "network", self.disk_cache)
+        elif self.widgets.get(key) and self._can_retry(key, reply):
+            self._retry(key)
+        else:
+            self._thumbnail_decoded(key, None, None, "network")
+        self._start_downloads()
+
+    def _thumbnail_decoded(self, key, thumbnail, data, source):
+        self._decoding.discard(key)
+        if thumbnail is not None:
+            cost = thumbnail.small.sizeInBytes() + thumbnail.large.sizeInBytes()
+            self.thumbnails.put(key, thumbnail, cost)
+            if source == "disk":
+                self._stats["disk_hits"] += 1
+        elif source == "disk":
+            if self.widgets.get(key):
+                # not cached, or an unreadable cache entry
+                self._stats["misses"] += 1
+                self._enqueue(key)
+                self._start_downloads()
+            else:
+                self._forget(key)
+            return
+        widgets = list(self.widgets.get(key, {}))
+        for w in widgets:
+            self._widget_keys.pop(w, None)
+        self._forget(key)
+        if thumbnail is None:
+            self._stats["failures"] += 1
+            return
+        for w in widgets:
+            try:
+                w.set_thumbnail(thumbnail)
+            except Exception:
+                # the underlying Qt widget might have been deleted
+                pass
 
 
 _thumbnailManager = ThumbnailManager()
 
 
-def download_thumbnail(url, widget):
-    _thumbnailManager.download_thumbnail(url, widget)
+def download_thumbnail(url, widget, priority=BACKGROUND_PRIORITY):
+    _thumbnailManager.download_thumbnail(url, widget, priority)
 
 
-def createCompoundThumbnail(_bboxes, thumbnails):
-    bboxes = []
-    transform = QgsCoordinateTransform(
-        QgsCoordinateReferenceSystem("EPSG:4326"),
-        QgsCoordinateReferenceSystem("EPSG:3857"),
-        QgsProject.instance(),
-    )
-    for box in _bboxes:
-        rect4326 = qgsgeometry_from_geojson(box).boundingBox()
-        rect = transform.transformBoundingBox(rect4326)
-        bboxes.append(
-            [rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum()]
+def cancel_thumbnail(widget):
+    _thumbnailManager.cancel(widget)
+
+
+def thumbnail_stats():
+    return _thumbnailManager.stats()
+
+
+class ViewportThumbnailLoader(QObject):
+    """
+    Requests the thumbnails of the rows of a tree view that are in its
+    viewport, and then those of the rows within one viewport height of it.
+    Requests for rows that leave that area are cancelled.
+
+    :param thumbnails_for_index: Function returning the (widget, url) pairs
+        of the thumbnails still needed by the row of an index
+    """
+
+    REFRESH_DELAY = 50  # ms
+
+    def __init__(self, view, thumbnails_for_index):
+        super().__init__(view)
+        self._view = view
+        self._thumbnails_for_index = thumbnails_for_index
+        self._requested = weakref.WeakSet()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.REFRESH_DELAY)
+        self._timer.timeout.connect(self.refresh)
+        view.verticalScrollBar().valueChanged.connect(self.schedule_refresh)
+        view.expanded.connect(self.schedule_refresh)
+        view.collapsed.connect(self.schedule_refresh)
+        view.viewport().installEventFilter(self)
+        model = view.model()
+        model.rowsInserted.connect(self.schedule_refresh)
+        model.rowsRemoved.connect(self.schedule_refresh)
+        model.modelReset.connect(self.schedule_refresh)
+        model.layoutChanged.connect(self.schedule_refresh)
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Resize, QEvent.Show):
+            self.schedule_refresh()
+        return False
+
+    def schedule_refresh(self, *args):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def refresh(self):
+        viewport = self._view.viewport().rect()
+        near = viewport.adjusted(0, -viewport.height(), 0, viewport.height())
+        wanted = {}
+        first = self._view.indexAt(QPoint(0, 0))
+        if first.isValid():
+            index = first
+            while index.isValid():
+                rect = self._view.visualRect(index)
+                if rect.top() > near.bottom():
+                    break
+                visible = rect.intersects(viewport)
+                priority = VISIBLE_PRIORITY if visible else NEAR_VIEWPORT_PRIORITY
+                self._add_wanted(wanted, index, priority)
+                index = self._view.indexBelow(index)
+            index = self._view.indexAbove(first)
+            while index.isValid():
+                if self._view.visualRect(index).bottom() < near.top():
+                    break
+                self._add_wanted(wanted, index, NEAR_VIEWPORT_PRIORITY)
+                index = self._view.indexAbove(index)
+        for widget in list(self._requested):
+            if widget not in wanted:
+                cancel_thumbnail(widget)
+        for widget, (url, priority) in wanted.items():
+            download_thumbnail(url, widget, priority)
+        self._requested = weakref.WeakSet(wanted)
+
+    def _add_wanted(self, wanted, index, priority):
+        for widget, url in self._thumbnails_for_index(index):
+            wanted.setdefault(widget, (url, priority))
+
+    def clear(self):
+        """
+        Cancels all the requests made for the rows of the view
+        """
+        self._timer.stop()
+        for widget in list(self._requested):
+            cancel_thumbnail(widget)
+        self._requested = weakref.WeakSet()
+
+
+_mercator_transform = None
+
+
+def _to_mercator(rect4326):
+    global _mercator_transform
+    if _mercator_transform is None:
+        _mercator_transform = QgsCoordinateTransform(
+            QgsCoordinateReferenceSystem("EPSG:4326"),
+            QgsCoordinateReferenceSystem("EPSG:3857"),
+            QgsProject.instance(),
         )
-    globalbox = (
-        min([v[0] for v in bboxes]),
-        min([v[1] for v in bboxes]),
-        max([v[2] for v in bboxes]),
-        max([v[3] for v in bboxes]),
-    )
+    rect = _mercator_transform.transformBoundingBox(rect4326)
+    return [rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum()]
+
+
+class CompoundThumbnail:
+    """
+    Composite of the thumbnails of a group of scenes, each one placed
+    according to its footprint.
+
+    Footprints are projected once when added. New thumbnails are painted
+    over the existing composite, which is only redrawn from scratch when
+    a new footprint extends the extent of the group.
+    """
+
     SIZE = 256
-    globalwidth = globalbox[2] - globalbox[0]
-    globalheight = globalbox[3] - globalbox[1]
-    pixmap = QPixmap(SIZE, SIZE)
-    pixmap.fill(Qt.transparent)
-    painter = QPainter(pixmap)
-    try:
-        for i, thumbnail in enumerate(thumbnails):
-            box = bboxes[i]
-            width = box[2] - box[0]
-            height = box[3] - box[1]
-            if width > height:
-                offsety = (width - height) / 2
-                offsetx = 0
-            else:
-                offsetx = (height - width) / 2
-                offsety = 0
-            x = int((box[0] - offsetx - globalbox[0]) / globalwidth * SIZE)
-            y = int((globalbox[3] - box[3] - offsety) / globalheight * SIZE)
-            outputwidth = int((width + 2 * offsetx) / globalwidth * SIZE)
-            outputheight = int((height + 2 * offsety) / globalheight * SIZE)
-            painter.drawPixmap(x, y, outputwidth, outputheight, thumbnail)
-    except Exception:
+
+    def __init__(self):
+        self._bboxes = {}
+        self._tiles = {}
+        self._pending = []
+        self._extent = None
+        self._pixmap = None
+        self._needs_redraw = False
+
+    def add_footprint(self, key, rect4326):
         """
-        Unexpected values for bboxes might cause uneexpected errors. We just ignore
-        them and return an empty image in that case
+        :param key: Identifier of the scene
+        :param rect4326: Bounding box of the scene footprint, in EPSG:4326
+        :type rect4326: QgsRectangle
         """
-    finally:
-        painter.end()
-    return pixmap
+        box = _to_mercator(rect4326)
+        self._bboxes[key] = box
+        if self._extent is None:
+            self._extent = list(box)
+            self._needs_redraw = True
+        elif (
+            box[0] < self._extent[0]
+            or box[1] < self._extent[1]
+            or box[2] > self._extent[2]
+            or box[3] > self._extent[3]
+        ):
+            self._extent = [
+                min(box[0], self._extent[0]),
+                min(box[1], self._extent[1]),
+                max(box[2], self._extent[2]),
+                max(box[3], self._extent[3]),
+            ]
+            self._needs_redraw = True
+
+    def add_tile(self, key, thumbnail):
+        if key in self._bboxes:
+            self._tiles[key] = thumbnail
+            self._pending.append(key)
+
+    def has_tiles(self):
+        return bool(self._tiles)
+
+    def render(self):
+        """
+        Paints the tiles added since the last call and returns the
+        composite pixmap
+        """
+        if self._pixmap is None or self._needs_redraw:
+            self._pixmap = QPixmap(self.SIZE, self.SIZE)
+            self._pixmap.fill(Qt.transparent)
+            keys = [k for k in self._bboxes if k in self._tiles]
+        else:
+            keys = self._pending
+        self._needs_redraw = False
+        self._pending = []
+        if not keys:
+            return self._pixmap
+        painter = QPainter(self._pixmap)
+        try:
+            for key in keys:
+                self._draw_tile(painter, self._bboxes[key], self._tiles[key])
+        except Exception:
+            """
+            Unexpected values for bboxes might cause uneexpected errors. We just ignore
+            them and return an empty image in that case
+            """
+        finally:
+            painter.end()
+        return self._pixmap
+
+    def _draw_tile(self, painter, box, thumbnail):
+        globalbox = self._extent
+        globalwidth = globalbox[2] - globalbox[0]
+        globalheight = globalbox[3] - globalbox[1]
+        width = box[2] - box[0]
+        height = box[3] - box[1]
+        if width > height:
+            offsety = (width - height) / 2
+            offsetx = 0
+        else:
+            offsetx = (height - width) / 2
+            offsety = 0
+        x = int((box[0] - offsetx - globalbox[0]) / globalwidth * self.SIZE)
+        y = int((globalbox[3] - box[3] - offsety) / globalheight * self.SIZE)
+        outputwidth = int((width + 2 * offsetx) / globalwidth * self.SIZE)
+        outputheight = int((height + 2 * offsety) / globalheight * self.SIZE)
+        painter.drawPixmap(x, y, outputwidth, outputheight, thumbnail)
+
+
+def createCompoundThumbnail(_bboxes, thumbnails):
+    compound = CompoundThumbnail()
+    for i, box in enumerate(_bboxes):
+        compound.add_footprint(i, qgsgeometry_from_geojson(box).boundingBox())
+    for i, thumbnail in enumerate(thumbnails):
+        compound.add_tile(i, thumbnail)
+    return compound.render()
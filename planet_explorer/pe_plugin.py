@@ -115,6 +115,8 @@ from planet_explorer.gui.pe_tasking_dockwidget import (
     remove_tasking_widget,
 )
 
+from planet_explorer.gui.pe_footprints import remove_footprint_overlay
+
 PLANET_COM = "https://planet.com"
 SAT_SPECS_PDF = (
     "https://assets.planet.com/docs/"
@@ -582,6 +584,7 @@ class PlanetExplorer(object):
         remove_explorer()
         remove_orders_monitor()
         remove_tasking_widget()
+        remove_footprint_overlay()
 
         QgsGui.layerTreeEmbeddedWidgetRegistry().removeProvider(self.provider.id())
 
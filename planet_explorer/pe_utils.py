@@ -116,6 +116,14 @@ ENABLE_CLIP_SETTING = "enableClip"
 ENABLE_STAC_METADATA = "enableStacMetadata"
 ENABLE_COMPOSITE = "enableComposite"
 ENABLE_HARMONIZATION_SETTING = "enableHarmonization"
+DOWNLOAD_WORKERS_SETTING = "downloadWorkers"
+DEFAULT_DOWNLOAD_WORKERS = 8
+RASTER_OPTIMIZATION_SETTING = "rasterOptimization"
+DEFAULT_RASTER_OPTIMIZATION = "None"
+MOSAIC_FORMAT_SETTING = "mosaicFormat"
+DEFAULT_MOSAIC_FORMAT = "Virtual raster (VRT)"
+THUMBNAIL_CACHE_SIZE_SETTING = "thumbnailCacheSize"
+DEFAULT_THUMBNAIL_CACHE_SIZE = 256  # MB
 
 BASE_URL = "https://www.planet.com"
 
@@ -199,17 +207,81 @@ def qgsgeometry_from_geojson(json_type):
 
 
 def area_coverage_for_image(image, request):
-    aoi_geom = geometry_from_request(request)
-    if aoi_geom is None:
-        return None
-    aoi_qgsgeom = qgsgeometry_from_geojson(aoi_geom)
-    aoi_area = aoi_qgsgeom.area()
-    if aoi_area == 0:
-        return 100
-    image_qgsgeom = qgsgeometry_from_geojson(image["geometry"])
-    intersection = aoi_qgsgeom.intersection(image_qgsgeom)
-    area_coverage = intersection.area() / aoi_area * 100
-    return area_coverage
+    return AoiCoverageCalculator(request).coverage(image)
+
+
+class AoiCoverageCalculator:
+    """
+    Computes the percentage of the AOI of a search request that is covered
+    by images. The AOI is parsed and prepared once, and the coverage of each
+    image is cached by its id.
+    """
+
+    def __init__(self, request):
+        self._coverages = {}
+        self._aoi = None
+        self._aoi_area = 0
+        self._engine = None
+        self._aoi_geojson = geometry_from_request(request) if request else None
+        if self._aoi_geojson is None:
+            return
+        self._aoi = qgsgeometry_from_geojson(self._aoi_geojson)
+        self._aoi_area = self._aoi.area()
+        if self._aoi_area:
+            self._engine = QgsGeometry.createGeometryEngine(self._aoi.constGet())
+            self._engine.prepareGeometry()
+
+    def has_aoi(self):
+        return self._aoi is not None
+
+    def has_same_aoi(self, request):
+        aoi_geojson = geometry_from_request(request) if request else None
+        return aoi_geojson == self._aoi_geojson
+
+    def coverage(self, image, geom=None):
+        """
+        :param image: API item
+        :type image: dict
+        :param geom: Already parsed geometry of the item, if available
+        :type geom: QgsGeometry
+        :return: Covered percentage of the AOI, or None if the request
+            has no AOI (e.g. it uses an ID filter)
+        :rtype: float | None
+        """
+        if self._aoi is None:
+            return None
+        image_id = image.get("id")
+        if image_id in self._coverages:
+            return self._coverages[image_id]
+        if self._engine is None:
+            area_coverage = 100
+        else:
+            if geom is None:
+                geom = qgsgeometry_from_geojson(image["geometry"])
+            area_coverage = self._compute(geom)
+        if image_id is not None:
+            self._coverages[image_id] = area_coverage
+        return area_coverage
+
+    def coverages(self, images, geoms=None):
+        """
+        Computes the coverage for a batch of images, e.g. a page of
+        search results.
+        """
+        if geoms is None:
+            geoms = [None] * len(images)
+        return [self.coverage(image, geom) for image, geom in zip(images, geoms)]
+
+    def _compute(self, geom):
+        image_geom = geom.constGet()
+        if image_geom is None or not self._engine.intersects(image_geom):
+            return 0
+        if self._engine.within(image_geom):
+            return 100
+        intersection = self._engine.intersection(image_geom)
+        if intersection is None:
+            return 0
+        return intersection.area() / self._aoi_area * 100
 
 
 def add_menu_section_action(text, menu, tag="b", pad=0.5):
@@ -475,6 +547,29 @@ def orders_download_folder():
     return download_folder
 
 
+def download_workers():
+    value = QSettings().value(
+        f"{SETTINGS_NAMESPACE}/{DOWNLOAD_WORKERS_SETTING}", DEFAULT_DOWNLOAD_WORKERS
+    )
+    try:
+        return max(1, int(float(value)))
+    except (TypeError, ValueError):
+        return DEFAULT_DOWNLOAD_WORKERS
+
+
+def raster_optimization():
+    return QSettings().value(
+        f"{SETTINGS_NAMESPACE}/{RASTER_OPTIMIZATION_SETTING}",
+        DEFAULT_RASTER_OPTIMIZATION,
+    )
+
+
+def mosaic_format():
+    return QSettings().value(
+        f"{SETTINGS_NAMESPACE}/{MOSAIC_FORMAT_SETTING}", DEFAULT_MOSAIC_FORMAT
+    )
+
+
 def mosaic_title(mosaic):
     date = iso8601.parse_date(mosaic[FIRST_ACQUIRED])
     if INTERVAL in mosaic:
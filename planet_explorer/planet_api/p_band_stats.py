@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    p_band_stats.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import json
+import os
+
+import numpy as np
+from osgeo import gdal
+
+STATS_SUFFIX = ".stats.json"
+
+# Cumulative count cut used to stretch the contrast of order layers
+CUMULATIVE_CUT_LOWER = 0.02
+CUMULATIVE_CUT_UPPER = 0.98
+
+# Bands are read decimated to at most this size on their longest side,
+# which GDAL serves from overviews when the raster has them
+SAMPLE_SIZE = 1024
+
+
+def stats_path(path):
+    return f"{path}{STATS_SUFFIX}"
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
+
+
+def compute_band_stats(path):
+    """
+    Returns a list with the (min, max) values of the cumulative count cut
+    of each band of a raster, ignoring nodata pixels
+    """
+    ds = gdal.Open(path)
+    if ds is None:
+        raise ValueError(f"Cannot open {path}")
+    scale = min(1.0, SAMPLE_SIZE / max(ds.RasterXSize, ds.RasterYSize))
+    width = max(1, int(ds.RasterXSize * scale))
+    height = max(1, int(ds.RasterYSize * scale))
+    stats = []
+    for i in range(ds.RasterCount):
+        band = ds.GetRasterBand(i + 1)
+        data = band.ReadAsArray(buf_xsize=width, buf_ysize=height).ravel()
+        nodata = band.GetNoDataValue()
+        if nodata is not None:
+            data = data[data != nodata]
+        if data.size:
+            low, high = np.percentile(
+                data, [CUMULATIVE_CUT_LOWER * 100, CUMULATIVE_CUT_UPPER * 100]
+            )
+            stats.append((float(low), float(high)))
+        else:
+            stats.append((0.0, 0.0))
+    return stats
+
+
+def write_band_stats(path):
+    """
+    Computes the cumulative count cut of the bands of a raster and saves
+    it in a JSON file next to it
+    """
+    stats = compute_band_stats(path)
+    sidecar = dict(
+        _source_signature(path),
+        cut=[CUMULATIVE_CUT_LOWER, CUMULATIVE_CUT_UPPER],
+        bands=stats,
+    )
+    tmp_path = f"{stats_path(path)}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(sidecar, f)
+    os.replace(tmp_path, stats_path(path))
+    return stats
+
+
+def read_band_stats(path):
+    """
+    Returns the cumulative count cut saved for the bands of a raster, or
+    None if there is none or the raster changed since it was computed
+    """
+    try:
+        with open(stats_path(path)) as f:
+            sidecar = json.load(f)
+        current = _source_signature(path)
+    except (OSError, ValueError):
+        return None
+    if (
+        sidecar.get("mtime") != current["mtime"]
+        or sidecar.get("size") != current["size"]
+        or sidecar.get("cut") != [CUMULATIVE_CUT_LOWER, CUMULATIVE_CUT_UPPER]
+    ):
+        return None
+    return [tuple(band) for band in sidecar.get("bands", [])]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    p_checksums.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Digests checked when a manifest lists several, by preference
+HASH_ALGORITHMS = ["sha256", "md5"]
+
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# hashlib releases the GIL while hashing large buffers, so threads hash
+# files in parallel
+DEFAULT_HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+Checksum = namedtuple("Checksum", ["path", "algorithm", "digest"])
+
+ChecksumMismatch = namedtuple(
+    "ChecksumMismatch", ["path", "algorithm", "expected", "actual"]
+)
+
+
+class ChecksumMismatchException(Exception):
+    def __init__(self, mismatches):
+        self.mismatches = mismatches
+        files = "\n".join(
+            f"{m.path}: {m.algorithm} is {m.actual}, expected {m.expected}"
+            for m in mismatches
+        )
+        super().__init__(f"Downloaded files do not match their checksums:\n{files}")
+
+
+def file_digest(path, algorithm):
+    """
+    Returns the hex digest of a file, and its size
+    """
+    hasher = hashlib.new(algorithm)
+    view = memoryview(bytearray(HASH_BUFFER_SIZE))
+    size = 0
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            read = f.readinto(view)
+            if not read:
+                break
+            hasher.update(view[:read])
+            size += read
+    return hasher.hexdigest(), size
+
+
+def manifest_checksums(manifest_file):
+    """
+    Returns a Checksum for each file listed with a digest in an Orders API
+    manifest.json, with paths relative to the folder of the manifest
+    """
+    base_folder = os.path.dirname(manifest_file)
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    checksums = []
+    for entry in manifest.get("files", []):
+        digests = entry.get("digests") or {}
+        for algorithm in HASH_ALGORITHMS:
+            if digests.get(algorithm):
+                checksums.append(
+                    Checksum(
+                        os.path.join(base_folder, entry["path"]),
+                        algorithm,
+                        digests[algorithm].lower(),
+                    )
+                )
+                break
+    return checksums
+
+
+class ChecksumVerifier:
+    """
+    Hashes files in a pool of threads and compares them with their
+    expected digests.
+
+    :param workers: Number of files hashed at the same time
+    :param progress_callback: Called with the hashing throughput, in bytes
+        per second, each time a file is hashed. It is called from the
+        thread that hashed the file.
+    """
+
+    def __init__(self, workers=DEFAULT_HASH_WORKERS, progress_callback=None):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+        self._progress_callback = progress_callback
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._active = 0
+        self._busy_since = None
+        self._busy_time = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def verify(self, checksum):
+        """
+        Returns a future for the ChecksumMismatch of a file, or None if it
+        matches its digest
+        """
+        return self._executor.submit(self._verify, checksum)
+
+    def throughput(self):
+        """
+        Returns the bytes hashed per second, not counting the time spent
+        waiting for files to hash
+        """
+        with self._lock:
+            busy_time = self._busy_time
+            if self._busy_since is not None:
+                busy_time += time.monotonic() - self._busy_since
+            return self._bytes / busy_time if busy_time else 0
+
+    def _verify(self, checksum):
+        with self._lock:
+            if not self._active:
+                self._busy_since = time.monotonic()
+            self._active += 1
+        try:
+            actual, size = file_digest(checksum.path, checksum.algorithm)
+        except FileNotFoundError:
+            actual, size = None, 0
+        finally:
+            with self._lock:
+                self._active -= 1
+                if not self._active:
+                    self._busy_time += time.monotonic() - self._busy_since
+                    self._busy_since = None
+        with self._lock:
+            self._bytes += size
+        if self._progress_callback is not None:
+            self._progress_callback(self.throughput())
+        if actual != checksum.digest:
+            return ChecksumMismatch(
+                checksum.path, checksum.algorithm, checksum.digest, actual
+            )
+        return None
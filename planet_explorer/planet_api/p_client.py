@@ -99,6 +99,7 @@ class PlanetClient(QObject, ClientV1):
 
         self._psscene_asset_types = None
         self._item_types = None
+        self._item_types_names = None
         self._bundles = None
         self._asset_types = {}
 
@@ -453,8 +454,10 @@ class PlanetClient(QObject, ClientV1):
         return self._item_types
 
     def item_types_names(self):
-        item_types = self.item_types()
-        return {t["id"]: t["display_name"] for t in item_types}
+        if self._item_types_names is None:
+            item_types = self.item_types()
+            self._item_types_names = {t["id"]: t["display_name"] for t in item_types}
+        return self._item_types_names
 
     def bundles(self):
         url = "https://us-central1-planet-webapps-prod.cloudfunctions.net/productBundles/latest"
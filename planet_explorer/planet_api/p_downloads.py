@@ -0,0 +1,555 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    p_downloads.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_WORKERS = 8
+
+# Size of the buffer each worker thread reads responses into
+BUFFER_SIZE = 1024 * 1024
+
+# Seconds between progress reports for a file
+PROGRESS_INTERVAL = 0.25
+
+# (connect, read) timeouts in seconds
+TIMEOUT = (15, 60)
+
+# Retries for failed connections and transient HTTP errors, waiting
+# BACKOFF_FACTOR * 2 ** (retry - 1) seconds between them
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS = [429, 500, 502, 503, 504]
+
+# Seconds between checks of the cancel callback
+CANCEL_POLL_INTERVAL = 0.2
+
+# Downloads queued per worker thread, ahead of the ones being downloaded
+QUEUED_PER_WORKER = 2
+
+JOURNAL_FILENAME = ".download_journal"
+PART_SUFFIX = ".part"
+
+COMPLETE = "complete"
+PARTIAL = "partial"
+
+Download = namedtuple("Download", ["url", "path"])
+
+
+class DownloadCanceledException(Exception):
+    pass
+
+
+class IncompleteDownloadException(Exception):
+    pass
+
+
+class InsufficientDiskSpaceException(Exception):
+    pass
+
+
+def check_free_space(folder, needed, reserved=0):
+    """
+    Raises InsufficientDiskSpaceException if the disk holding a folder
+    has less than `needed` bytes free, besides `reserved` ones
+    """
+    free = shutil.disk_usage(folder).free - reserved
+    if needed > free:
+        raise InsufficientDiskSpaceException(
+            f"Not enough disk space in {folder}: {needed / 1024**2:.1f} MB needed,"
+            f" {max(0, free) / 1024**2:.1f} MB available"
+        )
+
+
+class DownloadJournal:
+    """
+    Log of the files downloaded to a folder, kept in that folder so an
+    interrupted download can be resumed later.
+
+    Entries are appended as JSON lines, so recording a file costs the same
+    whatever the size of the order, and a line cut by a crash only loses
+    that update. The last line written for a file wins.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, JOURNAL_FILENAME)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _key(self, path):
+        return os.path.relpath(path, self.folder).replace(os.sep, "/")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    values = json.loads(line)
+                    key = values.pop("path")
+                except (ValueError, KeyError, AttributeError):
+                    continue
+                self._entries.setdefault(key, {}).update(values)
+
+    def entry(self, path):
+        with self._lock:
+            return dict(self._entries.get(self._key(path), {}))
+
+    def is_complete(self, path):
+        return self.entry(path).get("state") == COMPLETE
+
+    def update(self, path, **values):
+        key = self._key(path)
+        line = json.dumps(dict(path=key, **values))
+        with self._lock:
+            self._entries.setdefault(key, {}).update(values)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def start(self, path, size, etag, last_modified=None):
+        self.update(
+            path, state=PARTIAL, size=size, etag=etag, last_modified=last_modified
+        )
+
+    def complete(self, path, size):
+        self.update(path, state=COMPLETE, size=size)
+
+
+class Prefetcher:
+    """
+    Consumes an iterable in a background thread, so that slow items (like
+    pages of an API response) are fetched while the previous ones are
+    being used. At most `size` items are kept waiting.
+
+    The background thread stops after the current item once stop() is
+    called.
+    """
+
+    EXHAUSTED = object()
+
+    def __init__(self, iterable, size):
+        self._items = queue.Queue(maxsize=size)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._produce, args=(iterable,), daemon=True
+        )
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop_event.is_set():
+            try:
+                self._items.put(item, timeout=CANCEL_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self, iterable):
+        try:
+            for item in iterable:
+                if not self._put((item, None)):
+                    return
+        except BaseException as e:
+            self._put((self.EXHAUSTED, e))
+        else:
+            self._put((self.EXHAUSTED, None))
+
+    def get(self, block=True, timeout=None):
+        """
+        Returns the next item, or Prefetcher.EXHAUSTED after the last one.
+
+        Raises queue.Empty if there is none after `timeout` seconds (or
+        right away if `block` is False), and the errors raised by the
+        iterable.
+        """
+        item, error = self._items.get(block, timeout)
+        if error is not None:
+            raise error
+        return item
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def conditional_headers(entry):
+    """
+    Returns the headers asking a server to only send a file again if it
+    changed since the download recorded in a journal entry
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def is_unchanged(response, entry):
+    """
+    Returns True if a response to a conditional request is for the same
+    file recorded in a journal entry. Servers ignoring the conditional
+    headers answer with the whole file, which is then compared by ETag
+    and size before reading its body.
+    """
+    if response.status_code == 304:
+        return True
+    if response.status_code != 200 or not entry.get("etag"):
+        return False
+    length = int(response.headers.get("content-length") or -1)
+    return response.headers.get("etag") == entry["etag"] and length == entry.get("size")
+
+
+def create_session(workers=DEFAULT_WORKERS, proxies=None):
+    """
+    Returns a session that keeps up to `workers` connections per host
+    alive and retries failed requests with an exponential backoff
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=workers, pool_maxsize=workers, max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if proxies:
+        session.proxies.update(proxies)
+    return session
+
+
+class DownloadEngine:
+    """
+    Downloads files in parallel with a pool of worker threads sharing a
+    single keep-alive session.
+
+    Data is written to a .part file next to the target path, which is
+    only renamed to it once complete. With a journal, files already
+    completed are skipped and partial ones are resumed with HTTP Range
+    requests. If `revalidate` is True, completed files are requested again
+    with the ETag and date recorded for them instead of being skipped, and
+    only fetched if the server has a different version.
+
+    Downloads can be given as any iterable, including generators that
+    are still discovering the files to download. Those are consumed in a
+    background thread, so a slow generator does not delay the downloads
+    already found, nor errors and cancellation. Only a few downloads are
+    taken ahead of the workers, and the overall progress refers to the
+    files taken so far until the iterable is exhausted.
+
+    :param workers: Number of files downloaded at the same time
+    :param proxies: Proxies for the session, as in requests.Session.proxies
+    :param journal: Optional DownloadJournal for the destination folder
+    :param is_canceled: Function returning True once the downloads must
+        stop. It is only called from the thread running download().
+    :param progress_callback: Called with the overall progress, from 0 to
+        100, as data is received
+    :param file_progress_callback: Called with a Download and the bytes
+        received and expected for it (0 if unknown) as data is received
+    :param complete_callback: Called with each Download once its file is
+        complete, from the worker thread that downloaded it
+    :param space_factor: Disk space needed for each file, as a multiple of
+        its size. Before fetching a file, the engine checks that this much
+        space is free on top of what running downloads still need.
+    :param revalidate: Whether to check completed files for changes
+    """
+
+    def __init__(
+        self,
+        workers=DEFAULT_WORKERS,
+        proxies=None,
+        journal=None,
+        is_canceled=None,
+        progress_callback=None,
+        file_progress_callback=None,
+        complete_callback=None,
+        space_factor=1,
+        revalidate=False,
+    ):
+        self.workers = max(1, int(workers))
+        self.proxies = proxies
+        self.journal = journal
+        self._is_canceled = is_canceled
+        self._progress_callback = progress_callback
+        self._file_progress_callback = file_progress_callback
+        self._complete_callback = complete_callback
+        self.space_factor = space_factor
+        self.revalidate = revalidate
+        self.unchanged = 0
+        self._reserved = 0
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._buffers = threading.local()
+        self._total = None
+        self._count = 0
+        self._fractions = {}
+        self._fractions_sum = 0.0
+        self._progress = 0
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def canceled(self):
+        if self._is_canceled is not None and self._is_canceled():
+            self._cancel_event.set()
+        return self._cancel_event.is_set()
+
+    def download(self, downloads, prefetch=0):
+        """
+        Downloads an iterable of Download objects and returns their paths.
+
+        Raises DownloadCanceledException if canceled, or the first error
+        found in any download. Other downloads are stopped in both cases.
+
+        :param prefetch: Downloads taken from the iterable ahead of the
+            workers, if it is not a sequence
+        """
+        try:
+            self._total = len(downloads)
+        except TypeError:
+            self._total = None
+        self._count = 0
+        self._fractions = {}
+        self._fractions_sum = 0.0
+        self._progress = 0
+        self.unchanged = 0
+        paths = []
+        queued = self.workers * QUEUED_PER_WORKER
+        if self._total is None:
+            prefetcher = Prefetcher(downloads, max(prefetch, queued))
+        else:
+            prefetcher = None
+            downloads = iter(downloads)
+        exhausted = False
+        with create_session(self.workers, self.proxies) as session:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pending = set()
+                try:
+                    while True:
+                        pending = self._check(pending)
+                        while not exhausted and len(pending) < queued:
+                            if prefetcher is None:
+                                download = next(downloads, None)
+                                exhausted = download is None
+                            else:
+                                # only wait for the next download if there
+                                # are none in progress
+                                try:
+                                    download = prefetcher.get(
+                                        block=not pending,
+                                        timeout=CANCEL_POLL_INTERVAL,
+                                    )
+                                except queue.Empty:
+                                    break
+                                exhausted = download is Prefetcher.EXHAUSTED
+                            if exhausted:
+                                break
+                            with self._lock:
+                                i = self._count
+                                self._count += 1
+                                self._fractions[i] = 0.0
+                            paths.append(download.path)
+                            pending.add(
+                                executor.submit(
+                                    self._download_file, session, i, download
+                                )
+                            )
+                            pending = self._check(pending)
+                        if exhausted and not pending:
+                            break
+                        if pending:
+                            wait(
+                                pending,
+                                timeout=CANCEL_POLL_INTERVAL,
+                                return_when=FIRST_COMPLETED,
+                            )
+                except BaseException:
+                    self._cancel_event.set()
+                    for future in pending:
+                        future.cancel()
+                    raise
+                finally:
+                    if prefetcher is not None:
+                        prefetcher.stop()
+        return paths
+
+    def _check(self, pending):
+        """
+        Raises the first error of the downloads that are done, or
+        DownloadCanceledException if canceled. Returns the ones not done.
+        """
+        done = {future for future in pending if future.done()}
+        for future in done:
+            future.result()
+        if self.canceled():
+            raise DownloadCanceledException()
+        return pending - done
+
+    def _download_file(self, session, i, download):
+        if self._cancel_event.is_set():
+            raise DownloadCanceledException()
+        journal = self.journal
+        entry = journal.entry(download.path) if journal is not None else {}
+        part_path = download.path + PART_SUFFIX
+        offset = 0
+        headers = {}
+        complete = entry.get("state") == COMPLETE and os.path.exists(download.path)
+        if complete:
+            headers = conditional_headers(entry) if self.revalidate else {}
+            if not headers:
+                self._skip_file(i, download)
+                return
+        elif journal is not None and os.path.exists(part_path):
+            offset = os.path.getsize(part_path)
+            headers["Range"] = f"bytes={offset}-"
+            if entry.get("etag"):
+                headers["If-Range"] = entry["etag"]
+        with session.get(
+            download.url, stream=True, timeout=TIMEOUT, headers=headers
+        ) as r:
+            if complete and is_unchanged(r, entry):
+                with self._lock:
+                    self.unchanged += 1
+                self._skip_file(i, download)
+                return
+            if r.status_code == 416 and offset and offset == entry.get("size"):
+                # the partial file was already complete
+                received = total = offset
+            else:
+                r.raise_for_status()
+                length = int(r.headers.get("content-length") or 0)
+                if r.status_code != 206:
+                    offset = 0
+                    if journal is not None:
+                        journal.start(
+                            download.path,
+                            length,
+                            r.headers.get("etag"),
+                            r.headers.get("last-modified"),
+                        )
+                total = offset + length if length else 0
+                reserved = self._reserve_space(download, length)
+                try:
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        received = self._write_response(
+                            r, f, i, download, offset, total
+                        )
+                finally:
+                    with self._lock:
+                        self._reserved -= reserved
+        if total and received != total:
+            raise IncompleteDownloadException(
+                f"{download.url}: received {received} of {total} bytes"
+            )
+        os.replace(part_path, download.path)
+        if journal is not None:
+            journal.complete(download.path, received)
+        self._file_progress(i, download, received, received)
+        if self._complete_callback is not None:
+            self._complete_callback(download)
+
+    def _skip_file(self, i, download):
+        size = os.path.getsize(download.path)
+        self._file_progress(i, download, size, size)
+        if self._complete_callback is not None:
+            self._complete_callback(download)
+
+    def _reserve_space(self, download, length):
+        """
+        Checks that there is room for the remaining `length` bytes of a
+        download, and reserves it until the download ends
+        """
+        needed = int(length * self.space_factor)
+        folder = os.path.dirname(os.path.abspath(download.path))
+        with self._lock:
+            check_free_space(folder, needed, self._reserved)
+            self._reserved += needed
+        return needed
+
+    def _chunks(self, response):
+        """
+        Yields the body of a response in views of a buffer that is reused
+        for every chunk and every file downloaded by the calling thread
+        """
+        if response.headers.get("content-encoding", "identity") != "identity":
+            # compressed bodies must go through requests to be decoded
+            yield from response.iter_content(BUFFER_SIZE)
+            return
+        view = getattr(self._buffers, "view", None)
+        if view is None:
+            view = self._buffers.view = memoryview(bytearray(BUFFER_SIZE))
+        raw = response.raw
+        while True:
+            size = raw.readinto(view)
+            if not size:
+                break
+            yield view[:size]
+
+    def _write_response(self, response, f, i, download, received, total):
+        last_report = time.monotonic()
+        for chunk in self._chunks(response):
+            if self._cancel_event.is_set():
+                raise DownloadCanceledException()
+            f.write(chunk)
+            received += len(chunk)
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                self._file_progress(i, download, received, total)
+        return received
+
+    def _file_progress(self, i, download, received, total):
+        if self._file_progress_callback is not None:
+            self._file_progress_callback(download, received, total)
+        if self._progress_callback is None or not total:
+            return
+        with self._lock:
+            if i not in self._fractions:
+                return
+            fraction = min(1.0, received / total)
+            self._fractions_sum += fraction - self._fractions[i]
+            if fraction == 1.0:
+                # only files in progress are tracked, to keep memory bounded
+                del self._fractions[i]
+            else:
+                self._fractions[i] = fraction
+            count = self._total or self._count
+            progress = int(self._fractions_sum * 100 / count)
+            if progress != self._progress:
+                self._progress = progress
+                self._progress_callback(progress)
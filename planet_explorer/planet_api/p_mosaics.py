@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    p_mosaics.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import json
+import os
+import re
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from osgeo import gdal, osr
+
+from .p_overviews import build_overviews
+
+MOSAIC_VRT = "Virtual raster (VRT)"
+MOSAIC_GPKG = "GeoPackage"
+
+MOSAIC_FORMATS = [MOSAIC_VRT, MOSAIC_GPKG]
+
+# Rasters opened at the same time when checking that they are valid
+VALIDATION_WORKERS = os.cpu_count() or 1
+
+RASTER_MEDIA_TYPES = ["image/tiff", "application/vnd.lotus-notes"]
+
+# Sidecar listing the rasters a mosaic was built from
+SOURCES_SUFFIX = ".sources.json"
+
+ITEM_ID = "planet/item_id"
+ITEM_TYPE = "planet/item_type"
+ASSET_TYPE = "planet/asset_type"
+
+COMPOSITE = "composite"
+
+# Scene ids start with their acquisition date and time
+ITEM_ID_DATE = re.compile(r"^(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})")
+
+ManifestRaster = namedtuple(
+    "ManifestRaster", ["path", "item_type", "asset_type", "item_id", "acquired"]
+)
+
+
+class MosaicException(Exception):
+    pass
+
+
+def is_valid_raster(path):
+    return gdal.Open(path) is not None
+
+
+def raster_crs(path):
+    """
+    Returns the authority id of the CRS of a raster, like "EPSG:32633", or
+    its WKT if it has none
+    """
+    ds = gdal.Open(path)
+    wkt = ds.GetProjection() if ds is not None else ""
+    srs = osr.SpatialReference(wkt=wkt) if wkt else None
+    if srs is not None and srs.GetAuthorityName(None) and srs.GetAuthorityCode(None):
+        return f"{srs.GetAuthorityName(None)}:{srs.GetAuthorityCode(None)}"
+    return wkt
+
+
+def all_valid_rasters(paths):
+    """
+    Returns True if GDAL can open all the rasters in a list
+    """
+    with ThreadPoolExecutor(max_workers=VALIDATION_WORKERS) as executor:
+        return all(executor.map(is_valid_raster, paths))
+
+
+def build_vrt(path, files):
+    ds = gdal.BuildVRT(path, files)
+    if ds is None:
+        raise MosaicException(f"Cannot build virtual raster {path}")
+    ds = None
+    return path
+
+
+def _sources_signature(files):
+    signature = []
+    for path in files:
+        stat = os.stat(path)
+        signature.append([path, stat.st_size, stat.st_mtime])
+    return signature
+
+
+def write_mosaic_sources(path, files):
+    """
+    Saves the paths, sizes and modification times of the rasters of a
+    mosaic in a JSON file next to it
+    """
+    tmp_path = f"{path}{SOURCES_SUFFIX}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(_sources_signature(files), f)
+    os.replace(tmp_path, f"{path}{SOURCES_SUFFIX}")
+
+
+def is_mosaic_current(path, files):
+    """
+    Returns True if a mosaic exists and was built from a list of rasters
+    that have not changed since
+    """
+    try:
+        with open(f"{path}{SOURCES_SUFFIX}") as f:
+            sources = json.load(f)
+        return os.path.exists(path) and sources == _sources_signature(files)
+    except (OSError, ValueError):
+        return False
+
+
+def build_geopackage(path, files):
+    """
+    Builds a GeoPackage raster mosaic with overviews from a list of
+    rasters. GeoPackage tiles only hold 8 bit data, so other rasters are
+    mosaicked in a virtual raster instead.
+    """
+    vrt_path = f"{os.path.splitext(path)[0]}.vrt"
+    build_vrt(vrt_path, files)
+    vrt = gdal.Open(vrt_path)
+    if vrt.RasterCount > 4 or vrt.GetRasterBand(1).DataType != gdal.GDT_Byte:
+        return vrt_path
+    if os.path.exists(path):
+        os.remove(path)
+    ds = gdal.Translate(path, vrt, format="GPKG")
+    vrt = None
+    if ds is None:
+        raise MosaicException(f"Cannot build GeoPackage {path}")
+    ds = None
+    build_overviews(path)
+    os.remove(vrt_path)
+    return path
+
+
+def build_mosaic(path, files, mosaic_format=MOSAIC_VRT):
+    """
+    Builds a mosaic of a list of rasters, with `path` as its name without
+    extension. Returns the path of the mosaic.
+    """
+    if mosaic_format == MOSAIC_GPKG:
+        return build_geopackage(f"{path}.gpkg", files)
+    return build_vrt(f"{path}.vrt", files)
+
+
+def _acquired_dates(manifest, base_folder):
+    """
+    Returns the acquisition dates of the items in an order, read from the
+    metadata files listed in its manifest
+    """
+    dates = {}
+    for entry in manifest["files"]:
+        annotations = entry.get("annotations", {})
+        if entry["path"].endswith("_metadata.json") and ITEM_ID in annotations:
+            try:
+                with open(os.path.join(base_folder, entry["path"])) as f:
+                    metadata = json.load(f)
+                dates[annotations[ITEM_ID]] = metadata["properties"]["acquired"]
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+    return dates
+
+
+def _date_from_item_id(item_id):
+    match = ITEM_ID_DATE.match(item_id)
+    if match is None:
+        return item_id
+    year, month, day, hour, minute, second = match.groups()
+    return f"{year}-{month}-{day}T{hour}:{minute}:{second}"
+
+
+def manifest_rasters(manifest_file):
+    """
+    Returns a ManifestRaster for each image listed in an Orders API
+    manifest.json, leaving out udm assets and any other raster without an
+    asset type that is not a composite.
+
+    Items are dated with the acquisition date in their metadata, or the
+    one their id starts with if there is none.
+    """
+    base_folder = os.path.dirname(manifest_file)
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    dates = _acquired_dates(manifest, base_folder)
+    rasters = []
+    for entry in manifest["files"]:
+        if entry["media_type"] not in RASTER_MEDIA_TYPES:
+            continue
+        annotations = entry.get("annotations", {})
+        path = entry["path"]
+        if ASSET_TYPE in annotations:
+            asset_type = annotations[ASSET_TYPE]
+            if asset_type.endswith("_udm") or asset_type.endswith("_udm2"):
+                continue
+        elif path.endswith("composite.tif") or path.endswith(
+            "composite_file_format.ntf"
+        ):
+            asset_type = COMPOSITE
+        else:
+            continue
+        item_id = annotations.get(ITEM_ID, os.path.basename(path))
+        rasters.append(
+            ManifestRaster(
+                os.path.join(base_folder, path),
+                annotations.get(ITEM_TYPE, COMPOSITE),
+                asset_type,
+                item_id,
+                dates.get(item_id) or _date_from_item_id(item_id),
+            )
+        )
+    return rasters
+
+
+def mosaic_groups(rasters):
+    """
+    Groups a list of ManifestRaster by item type and asset type, sorted by
+    acquisition date so the latest scenes are drawn on top when mosaicked
+    """
+    groups = defaultdict(list)
+    for raster in rasters:
+        groups[(raster.item_type, raster.asset_type)].append(raster)
+    for group in groups.values():
+        group.sort(key=lambda r: r.acquired)
+    return dict(groups)
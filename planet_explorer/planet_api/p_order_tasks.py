@@ -23,13 +23,12 @@ __revision__ = "$Format:%H$"
 
 import json
 import os
-import shutil
+import threading
 import traceback
 import zipfile
 from collections import defaultdict
-
-import requests
-from osgeo import gdal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 from qgis.core import (
     Qgis,
@@ -39,11 +38,159 @@ from qgis.core import (
     QgsTask,
 )
 
-from qgis.PyQt.QtCore import QUrl
+from qgis.PyQt.QtCore import QCoreApplication, QUrl
 from qgis.PyQt.QtGui import QDesktopServices
 from qgis.PyQt.QtWidgets import QPushButton
 
-from ..pe_utils import QGIS_LOG_SECTION_NAME, iface
+from ..pe_utils import (
+    QGIS_LOG_SECTION_NAME,
+    download_workers,
+    iface,
+    mosaic_format,
+    raster_optimization,
+)
+from .p_band_stats import read_band_stats, write_band_stats
+from .p_checksums import (
+    ChecksumMismatchException,
+    ChecksumVerifier,
+    manifest_checksums,
+)
+from .p_client import PlanetClient
+from .p_downloads import (
+    CANCEL_POLL_INTERVAL,
+    Download,
+    DownloadCanceledException,
+    DownloadEngine,
+    DownloadJournal,
+    check_free_space,
+)
+from .p_mosaics import (
+    all_valid_rasters,
+    build_mosaic,
+    build_vrt,
+    is_mosaic_current,
+    mosaic_groups,
+    raster_crs,
+    write_mosaic_sources,
+)
+from .p_overviews import (
+    OPTIMIZE_EXTERNAL_OVERVIEWS,
+    OPTIMIZE_NONE,
+    OPTIMIZATION_MODES,
+    build_overviews,
+    has_overviews,
+    optimize_raster,
+)
+
+# Times an archive is downloaded before giving up if its files do not
+# match their checksums
+MAX_VERIFY_ATTEMPTS = 3
+
+# Folder of a scene order where its mosaics are built
+MOSAICS_FOLDER = "mosaics"
+
+# Quads listed ahead of the ones being downloaded
+QUADS_QUEUE_SIZE = 1000
+
+# GDAL releases the GIL while building overviews or reading data, so
+# rasters are processed in threads, one per core
+RASTER_WORKERS = os.cpu_count() or 1
+
+
+def download_engine(task, journal, is_canceled=None, **kwargs):
+    """
+    Returns a download engine that reports its progress to a task and
+    stops when the task is canceled.
+
+    :param is_canceled: Function to use instead of task.isCanceled. The
+        engine calls it from the task thread while downloading, so it can
+        also update the task description.
+    """
+    return DownloadEngine(
+        workers=task.workers,
+        proxies=dict(PlanetClient.getInstance().dispatcher.session.proxies),
+        journal=journal,
+        is_canceled=is_canceled or task.isCanceled,
+        progress_callback=task.setProgress,
+        **kwargs,
+    )
+
+
+def is_udm(filename):
+    return filename.endswith("_udm.tif") or filename.endswith("_udm2.tif")
+
+
+def is_optimized(journal, path):
+    """
+    Returns True if a raster was optimized with the current settings and
+    has not changed since
+    """
+    entry = journal.entry(path)
+    return entry.get("optimization") == raster_optimization() and entry.get(
+        "optimized"
+    ) == os.path.getmtime(path)
+
+
+def rewritten_by_optimization(journal, path):
+    """
+    Returns True if a raster was modified when optimizing it, so it no
+    longer matches the file that was downloaded
+    """
+    entry = journal.entry(path)
+    return entry.get("optimization", OPTIMIZE_NONE) not in (
+        OPTIMIZE_NONE,
+        OPTIMIZE_EXTERNAL_OVERVIEWS,
+    ) and entry.get("optimized") == os.path.getmtime(path)
+
+
+def process_rasters(task, paths, function, stage):
+    """
+    Calls a function with each raster in a list, in a pool of threads,
+    and yields each raster once processed
+    """
+    description = task.description()
+    with ThreadPoolExecutor(max_workers=RASTER_WORKERS) as executor:
+        futures = {executor.submit(function, p): p for p in paths}
+        try:
+            for i, future in enumerate(as_completed(futures)):
+                if task.isCanceled():
+                    raise DownloadCanceledException()
+                future.result()
+                task.setDescription(f"{description} ({stage}, {i + 1} of {len(paths)})")
+                yield futures[future]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            task.setDescription(description)
+
+
+def optimize_rasters(task, paths, journal):
+    """
+    Builds overviews for rasters, or converts them to COG, as set in the
+    plugin settings. Rasters already optimized are skipped.
+    """
+    mode = raster_optimization()
+    if mode == OPTIMIZE_NONE or mode not in OPTIMIZATION_MODES:
+        return
+    paths = [p for p in paths if os.path.exists(p) and not is_optimized(journal, p)]
+    for path in process_rasters(
+        task, paths, lambda p: optimize_raster(p, mode), "optimizing rasters"
+    ):
+        journal.update(path, optimization=mode, optimized=os.path.getmtime(path))
+
+
+def compute_rasters_stats(task, paths):
+    """
+    Computes the contrast statistics used to load rasters, skipping the
+    ones that already have them
+    """
+    paths = [p for p in paths if read_band_stats(p) is None]
+    for _ in process_rasters(
+        task, paths, write_band_stats, "computing band statistics"
+    ):
+        pass
 
 
 class OrderProcessorTask(QgsTask):
@@ -52,55 +199,169 @@ class OrderProcessorTask(QgsTask):
         self.exception = None
         self.order = order
         self.filenames = []
+        self.workers = download_workers()
+        self.valid = True
+        self.verifier = None
+        self._throughput = 0
 
     def run(self):
         try:
-            chunk_size = 1024
             locations = self.order.locations()
             download_folder = self.order.download_folder()
-            if os.path.exists(download_folder):
-                shutil.rmtree(download_folder)
-            os.makedirs(download_folder)
-            zip_locations = [
-                (url, path) for url, path in locations if path.lower().endswith("zip")
-            ]
-            for url, path in zip_locations:
-                local_filename = os.path.basename(path)
-                local_fullpath = os.path.join(download_folder, local_filename)
-                self.filenames.append(local_fullpath)
-                r = requests.get(url, stream=True)
-                file_size = r.headers.get("content-length") or 0
-                file_size = int(file_size)
-                percentage_per_chunk = (100.0 / len(zip_locations)) / (
-                    file_size / chunk_size
-                )
-                progress = 0
-                with open(local_fullpath, "wb") as f:
-                    for chunk in r.iter_content(chunk_size):
-                        f.write(chunk)
-                        progress += percentage_per_chunk
-                        self.setProgress(progress)
-                        if self.isCanceled():
-                            return False
+            os.makedirs(download_folder, exist_ok=True)
+            journal = DownloadJournal(download_folder)
+            downloads = []
+            for url, path in locations:
+                if path.lower().endswith("zip"):
+                    local_filename = os.path.basename(path)
+                    local_fullpath = os.path.join(download_folder, local_filename)
+                    self.filenames.append(local_fullpath)
+                    downloads.append(Download(url, local_fullpath))
+
+            with ChecksumVerifier() as verifier:
+                self.verifier = verifier
+                pending = downloads
+                for attempt in range(MAX_VERIFY_ATTEMPTS):
+                    mismatches = self.download_and_verify(pending, journal, verifier)
+                    if not mismatches:
+                        break
+                    # archives with a corrupted file are downloaded again
+                    archives = set()
+                    for archive, mismatch in mismatches:
+                        QgsMessageLog.logMessage(
+                            f"Order '{self.order.name()}': {mismatch.path} does"
+                            f" not match its {mismatch.algorithm} checksum."
+                            f" Downloading {os.path.basename(archive)} again",
+                            QGIS_LOG_SECTION_NAME,
+                            Qgis.Warning,
+                        )
+                        archives.add(archive)
+                    for archive in archives:
+                        journal.update(archive, state=None, extracted=False)
+                    pending = [d for d in downloads if d.path in archives]
+                else:
+                    raise ChecksumMismatchException([m for _, m in mismatches])
 
             self.process_download()
+            self.setDescription(f"Processing order {self.order.name()}")
+            rasters = [f for f, _ in self.images if not is_udm(f)]
+            optimize_rasters(self, rasters, journal)
+            self.valid = all_valid_rasters(rasters)
+            if self.valid:
+                compute_rasters_stats(self, rasters)
 
             return True
+        except DownloadCanceledException:
+            return False
         except Exception:
             self.exception = traceback.format_exc()
             return False
 
+    def download_and_verify(self, downloads, journal, verifier):
+        """
+        Downloads and extracts order archives, verifying the files in them
+        against the checksums in their manifests.
+
+        Returns a list of (archive, ChecksumMismatch) tuples for the files
+        that do not match.
+        """
+        verifications = []
+
+        def verify(filename):
+            output_folder = os.path.splitext(filename)[0]
+            manifest_file = os.path.join(output_folder, "manifest.json")
+            for checksum in manifest_checksums(manifest_file):
+                if not rewritten_by_optimization(journal, checksum.path):
+                    verifications.append((filename, verifier.verify(checksum)))
+
+        # Archives extracted by a previous run are verified while the rest
+        # are downloaded
+        to_download = []
+        for download in downloads:
+            if journal.entry(download.path).get("extracted"):
+                verify(download.path)
+            else:
+                to_download.append(download)
+
+        # Archives are extracted in a separate thread as soon as they are
+        # downloaded, while the rest keep downloading, and their files are
+        # verified once extracted. Room is checked for both the archive and
+        # its extracted content.
+        try:
+            with ThreadPoolExecutor(max_workers=1) as extractor:
+                extractions = []
+
+                def extract(download):
+                    extractions.append(
+                        extractor.submit(self.extract, download.path, journal, verify)
+                    )
+
+                engine = download_engine(
+                    self,
+                    journal,
+                    is_canceled=self.download_canceled,
+                    complete_callback=extract,
+                    space_factor=2,
+                )
+                try:
+                    engine.download(to_download)
+                except BaseException:
+                    for extraction in extractions:
+                        extraction.cancel()
+                    raise
+            for extraction in extractions:
+                extraction.result()
+            mismatches = []
+            for archive, verification in verifications:
+                while True:
+                    if self.download_canceled():
+                        raise DownloadCanceledException()
+                    try:
+                        mismatch = verification.result(timeout=CANCEL_POLL_INTERVAL)
+                        break
+                    except FutureTimeoutError:
+                        pass
+                if mismatch is not None:
+                    mismatches.append((archive, mismatch))
+            return mismatches
+        finally:
+            for _, verification in verifications:
+                verification.cancel()
+
+    def extract(self, filename, journal, verify):
+        output_folder = os.path.splitext(filename)[0]
+        os.makedirs(output_folder, exist_ok=True)
+        with zipfile.ZipFile(filename, "r") as z:
+            check_free_space(
+                output_folder, sum(info.file_size for info in z.infolist())
+            )
+            z.extractall(output_folder)
+        os.remove(filename)
+        journal.update(filename, extracted=True)
+        verify(filename)
+
+    def download_canceled(self):
+        """
+        Returns True if the task was canceled. It is called from the task
+        thread while downloading and verifying, and shows there the
+        throughput of the hashing threads in the task description.
+        """
+        throughput = round(self.verifier.throughput() / 1024**2, 1)
+        if throughput and throughput != self._throughput:
+            self._throughput = throughput
+            self.setDescription(
+                f"Processing order {self.order.name()}"
+                f" (verifying at {throughput:.1f} MB/s)"
+            )
+        return self.isCanceled()
+
     def process_download(self):
         self.msg = []
+        self.images = []
         for filename in self.filenames:
             output_folder = os.path.splitext(filename)[0]
-            if not os.path.exists(output_folder):
-                os.makedirs(output_folder)
-            with zipfile.ZipFile(filename, "r") as z:
-                z.extractall(output_folder)
-            os.remove(filename)
             manifest_file = os.path.join(output_folder, "manifest.json")
-            self.images = self.images_from_manifest(manifest_file)
+            self.images.extend(self.images_from_manifest(manifest_file))
 
     def images_from_manifest(self, manifest_file):
         base_folder = os.path.dirname(manifest_file)
@@ -139,14 +400,7 @@ class OrderProcessorTask(QgsTask):
 
     def finished(self, result):
         if result:
-            layers = []
-            for filename, image_type in self.images:
-                if filename.endswith("_udm.tif") or filename.endswith("_udm2.tif"):
-                    # Skips all udm rasters
-                    continue
-                layers.append(QgsRasterLayer(filename, os.path.basename(filename)))
-            validity = [lay.isValid() for lay in layers]
-            if False in validity:
+            if not self.valid:
                 widget = iface.messageBar().createMessage(
                     "Planet Explorer",
                     f"Order '{self.order.name()}' correctly downloaded ",
@@ -189,54 +443,121 @@ class QuadsOrderProcessorTask(QgsTask):
         self.exception = None
         self.order = order
         self.filenames = defaultdict(list)
+        self.workers = download_workers()
+        self.unchanged = 0
+        self.listed = 0
+        self.listing = False
+        self.downloaded = 0
+        self._lock = threading.Lock()
+        self._description = None
+        self.mosaic_format = mosaic_format()
+        self.valid = True
+        self.layers = []
 
     def run(self):
         try:
-            chunk_size = 1024
-            locations = self.order.locations()
             download_folder = self.order.download_folder()
-            if os.path.exists(download_folder):
-                shutil.rmtree(download_folder)
-            os.makedirs(download_folder)
-            i = 0
-            total = sum([len(x) for x in locations.values()])
-            for mosaic, files in locations.items():
-                if files:
-                    folder = os.path.join(download_folder, mosaic)
-                    os.makedirs(folder, exist_ok=True)
-                    for url, path in files:
-                        local_filename = os.path.basename(path) + ".tif"
-                        local_fullpath = os.path.join(
-                            download_folder, mosaic, local_filename
-                        )
-                        self.filenames[mosaic].append(local_fullpath)
-                        r = requests.get(url, stream=True)
-                        with open(local_fullpath, "wb") as f:
-                            for chunk in r.iter_content(chunk_size):
-                                f.write(chunk)
-                        i += 1
-                        self.setProgress(i * 100 / total)
-                        if self.isCanceled():
-                            return False
+            os.makedirs(download_folder, exist_ok=True)
+            journal = DownloadJournal(download_folder)
+            # quads downloaded by a previous run are only fetched again if
+            # they changed since then
+            engine = download_engine(
+                self,
+                journal,
+                is_canceled=self.download_canceled,
+                complete_callback=self.quad_downloaded,
+                revalidate=True,
+            )
+            # pages of quads are fetched in the background by the engine and
+            # their quads downloaded as soon as they arrive
+            self.listing = True
+            engine.download(
+                self.quad_downloads(self.order.locations(), journal),
+                prefetch=QUADS_QUEUE_SIZE,
+            )
+            self.unchanged = engine.unchanged
+            self.setDescription(f"Processing order {self.order.name}")
+            rasters = [f for files in self.filenames.values() for f in files]
+            optimize_rasters(self, rasters, journal)
+            self.valid = all_valid_rasters(rasters)
+            if self.valid:
+                self.create_layers()
 
             return True
+        except DownloadCanceledException:
+            return False
         except Exception:
             self.exception = traceback.format_exc()
             return False
 
-    def finished(self, result):
-        if result:
-            layers = {}
-            valid = True
-            for mosaic, files in self.filenames.items():
-                mosaiclayers = []
+    def create_layers(self):
+        """
+        Builds the mosaics of the order if needed and creates the layers to
+        add to the project, which are then moved to the main thread
+        """
+        download_folder = self.order.download_folder()
+        for mosaic, files in self.filenames.items():
+            if self.isCanceled():
+                raise DownloadCanceledException()
+            if self.order.load_as_virtual:
+                self.setDescription(
+                    f"Processing order {self.order.name} (building mosaic {mosaic})"
+                )
+                path = build_mosaic(
+                    os.path.join(download_folder, mosaic, mosaic),
+                    files,
+                    self.mosaic_format,
+                )
+                self.layers.append(QgsRasterLayer(path, mosaic, "gdal"))
+            else:
                 for filename in files:
-                    mosaiclayers.append(
+                    self.layers.append(
                         QgsRasterLayer(filename, os.path.basename(filename), "gdal")
                     )
-                layers[mosaic] = mosaiclayers
-                valid = valid and (False not in [lay.isValid() for lay in mosaiclayers])
-            if not valid:
+        main_thread = QCoreApplication.instance().thread()
+        for layer in self.layers:
+            layer.moveToThread(main_thread)
+
+    def quad_downloads(self, locations, journal):
+        download_folder = self.order.download_folder()
+        for mosaic, url, quad_id in locations:
+            folder = os.path.join(download_folder, mosaic)
+            if mosaic not in self.filenames:
+                os.makedirs(folder, exist_ok=True)
+            local_fullpath = os.path.join(folder, os.path.basename(quad_id) + ".tif")
+            self.filenames[mosaic].append(local_fullpath)
+            if journal.entry(local_fullpath).get("quad") != quad_id:
+                journal.update(local_fullpath, quad=quad_id)
+            with self._lock:
+                self.listed += 1
+            yield Download(url, local_fullpath)
+        with self._lock:
+            self.listing = False
+
+    def quad_downloaded(self, download):
+        with self._lock:
+            self.downloaded += 1
+
+    def download_canceled(self):
+        """
+        Returns True if the task was canceled. The download engine calls it
+        from the task thread, where the counts updated by the listing and
+        download threads are shown in the task description.
+        """
+        with self._lock:
+            listing = ", listing quads" if self.listing else ""
+            description = (
+                f"Processing order {self.order.name}"
+                f" ({self.downloaded} of {self.listed} quads downloaded{listing})"
+            )
+        if description != self._description:
+            self._description = description
+            self.setDescription(description)
+        return self.isCanceled()
+
+    def finished(self, result):
+        if result:
+            if not self.valid:
                 widget = iface.messageBar().createMessage(
                     "Planet Explorer",
                     f"Order '{self.order.name}' correctly downloaded ",
@@ -251,22 +572,18 @@ class QuadsOrderProcessorTask(QgsTask):
                 widget.layout().addWidget(button)
                 iface.messageBar().pushWidget(widget, level=Qgis.Success)
             else:
-                if self.order.load_as_virtual:
-                    for mosaic, files in self.filenames.items():
-                        vrtpath = os.path.join(
-                            self.order.download_folder(), mosaic, f"{mosaic}.vrt"
-                        )
-                        gdal.BuildVRT(vrtpath, files)
-                        layer = QgsRasterLayer(vrtpath, mosaic, "gdal")
-                        QgsProject.instance().addMapLayer(layer)
-                else:
-                    for mosaic, mosaiclayers in layers.items():
-                        for layer in mosaiclayers:
-                            QgsProject.instance().addMapLayer(layer)
-                        # TODO create groups
+                # TODO create groups
+                QgsProject.instance().addMapLayers(self.layers)
+                message = (
+                    f"Order '{self.order.name}' correctly downloaded and processed"
+                )
+                if self.unchanged:
+                    message += (
+                        f" ({self.unchanged} unchanged quads were not downloaded)"
+                    )
                 iface.messageBar().pushMessage(
                     "Planet Explorer",
-                    f"Order '{self.order.name}' correctly downloaded and processed",
+                    message,
                     level=Qgis.Success,
                     duration=5,
                 )
@@ -283,3 +600,88 @@ class QuadsOrderProcessorTask(QgsTask):
                 level=Qgis.Warning,
                 duration=5,
             )
+
+
+class OrderMosaicTask(QgsTask):
+    """
+    Builds a virtual mosaic with overviews for each item type and asset
+    type of a downloaded order, with the latest scenes on top.
+
+    :param rasters: ManifestRaster objects of the order to mosaic
+    """
+
+    def __init__(self, order, rasters):
+        super().__init__(
+            f"Building mosaics for order {order.name()}", QgsTask.CanCancel
+        )
+        self.exception = None
+        self.order = order
+        self.rasters = rasters
+        self.mosaics = []
+
+    def run(self):
+        try:
+            folder = os.path.join(self.order.download_folder(), MOSAICS_FOLDER)
+            os.makedirs(folder, exist_ok=True)
+            groups = mosaic_groups(self.rasters)
+            for i, ((item_type, asset_type), rasters) in enumerate(groups.items()):
+                # scenes in different projections cannot share a virtual raster
+                by_crs = defaultdict(list)
+                for raster in rasters:
+                    if self.isCanceled():
+                        return False
+                    by_crs[raster_crs(raster.path)].append(raster)
+                for j, (crs, crs_rasters) in enumerate(by_crs.items()):
+                    name = f"{item_type} {asset_type}"
+                    if len(by_crs) > 1:
+                        # CRS without an authority id are numbered instead
+                        name = f"{name} {crs if len(crs) <= 20 else j + 1}"
+                    self.mosaics.append(
+                        (self.build_mosaic(folder, name, crs_rasters), name)
+                    )
+                self.setProgress(100 * (i + 1) / len(groups))
+            return True
+        except Exception:
+            self.exception = traceback.format_exc()
+            return False
+
+    def build_mosaic(self, folder, name, rasters):
+        """
+        Returns the path of the mosaic of a list of rasters, or the raster
+        itself if there is only one. Mosaics built before from the same
+        rasters are reused as they are.
+        """
+        if len(rasters) == 1:
+            return rasters[0].path
+        path = os.path.join(folder, f"{name.replace(' ', '_').replace(':', '')}.vrt")
+        files = [r.path for r in rasters]
+        if not is_mosaic_current(path, files):
+            self.setDescription(
+                f"Building mosaics for order {self.order.name()} ({name})"
+            )
+            if os.path.exists(f"{path}.ovr"):
+                os.remove(f"{path}.ovr")
+            build_vrt(path, files)
+            # GDAL uses the overviews of the scenes if they all have them
+            if not has_overviews(path):
+                build_overviews(path, external=True)
+            write_mosaic_sources(path, files)
+        if read_band_stats(path) is None:
+            write_band_stats(path)
+        return path
+
+    def finished(self, result):
+        if not result and self.exception is not None:
+            QgsMessageLog.logMessage(
+                f"Mosaics for order '{self.order.name()}' could not be"
+                f" built.\n{self.exception}",
+                QGIS_LOG_SECTION_NAME,
+                Qgis.Warning,
+            )
+            iface.messageBar().pushMessage(
+                "Planet Explorer",
+                f"Mosaics for order '{self.order.name()}' could not be built. See"
+                " log for details",
+                level=Qgis.Warning,
+                duration=5,
+            )
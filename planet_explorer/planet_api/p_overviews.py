@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    p_overviews.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import os
+
+from osgeo import gdal
+
+OPTIMIZE_NONE = "None"
+OPTIMIZE_INTERNAL_OVERVIEWS = "Internal overviews"
+OPTIMIZE_EXTERNAL_OVERVIEWS = "External overviews"
+OPTIMIZE_COG = "Cloud optimized GeoTIFF"
+
+OPTIMIZATION_MODES = [
+    OPTIMIZE_NONE,
+    OPTIMIZE_INTERNAL_OVERVIEWS,
+    OPTIMIZE_EXTERNAL_OVERVIEWS,
+    OPTIMIZE_COG,
+]
+
+# Overviews are added until the smallest one fits in a tile of this size
+MIN_OVERVIEW_SIZE = 256
+
+OVERVIEW_RESAMPLING = "AVERAGE"
+
+
+class RasterOptimizationException(Exception):
+    pass
+
+
+def overview_levels(width, height):
+    """
+    Returns the decimation factors of the overviews for a raster size
+    """
+    levels = []
+    factor = 2
+    while max(width, height) / factor >= MIN_OVERVIEW_SIZE:
+        levels.append(factor)
+        factor *= 2
+    return levels
+
+
+def has_overviews(path):
+    ds = gdal.Open(path)
+    return (
+        ds is not None
+        and ds.RasterCount > 0
+        and ds.GetRasterBand(1).GetOverviewCount() > 0
+    )
+
+
+def build_overviews(path, external=False):
+    """
+    Builds overviews for a raster, inside the file or in an .ovr file
+    next to it
+    """
+    ds = gdal.Open(path, gdal.GA_ReadOnly if external else gdal.GA_Update)
+    if ds is None:
+        raise RasterOptimizationException(f"Cannot open {path}")
+    levels = overview_levels(ds.RasterXSize, ds.RasterYSize)
+    if levels and ds.BuildOverviews(OVERVIEW_RESAMPLING, levels) != 0:
+        raise RasterOptimizationException(f"Cannot build overviews for {path}")
+    ds = None
+
+
+def convert_to_cog(path):
+    """
+    Rewrites a GeoTIFF as a cloud optimized GeoTIFF with overviews. Falls
+    back to internal overviews with GDAL versions lacking the COG driver.
+    """
+    if gdal.GetDriverByName("COG") is None:
+        build_overviews(path)
+        return
+    tmp_path = f"{path}.cog.tmp"
+    try:
+        ds = gdal.Translate(
+            tmp_path,
+            path,
+            format="COG",
+            creationOptions=[
+                "COMPRESS=DEFLATE",
+                f"RESAMPLING={OVERVIEW_RESAMPLING}",
+                "BIGTIFF=IF_SAFER",
+            ],
+        )
+        if ds is None:
+            raise RasterOptimizationException(f"Cannot convert {path} to COG")
+        ds = None
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def optimize_raster(path, mode):
+    if mode == OPTIMIZE_INTERNAL_OVERVIEWS:
+        build_overviews(path)
+    elif mode == OPTIMIZE_EXTERNAL_OVERVIEWS:
+        build_overviews(path, external=True)
+    elif mode == OPTIMIZE_COG:
+        convert_to_cog(path)
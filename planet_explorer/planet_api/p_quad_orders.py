@@ -99,15 +99,12 @@ class QuadOrder:
         self._id = uuid.uuid3(uuid.NAMESPACE_DNS, name)
 
     def locations(self):
-        locations = {}
+        """
+        Yields the mosaic name, download URL and id of each quad in the order
+        """
         for mosaic, mosaicquads in self.quads.items():
-            mosaiclocations = []
             for quad in mosaicquads:
-                mosaiclocations.append(
-                    (f"{quad[LINKS][DOWNLOAD]}&ua={user_agent()}", quad[ID])
-                )
-            locations[mosaic] = mosaiclocations
-        return locations
+                yield mosaic, f"{quad[LINKS][DOWNLOAD]}&ua={user_agent()}", quad[ID]
 
     def download_folder(self):
         return os.path.join(orders_download_folder(), "basemaps", self.name)
@@ -132,17 +129,16 @@ class QuadCompleteOrder(QuadOrder):
         self._id = uuid.uuid4()
 
     def locations(self):
+        """
+        Yields the mosaic name, download URL and id of each quad in the
+        order, fetching the pages of quads of each mosaic as they are needed
+        """
         p_client = PlanetClient.getInstance()
-        locations = {}
         for mosaic in self.mosaics:
-            json_quads = []
             quads = p_client.get_quads_for_mosaic(mosaic, minimal=True)
             for page in quads.iter():
-                json_quads.extend(page.get().get(MosaicQuads.ITEM_KEY))
-            locations[mosaic[NAME]] = [
-                (quad[LINKS][DOWNLOAD], quad[ID]) for quad in json_quads
-            ]
-        return locations
+                for quad in page.get().get(MosaicQuads.ITEM_KEY):
+                    yield mosaic[NAME], quad[LINKS][DOWNLOAD], quad[ID]
 
     def id(self):
         return self._id
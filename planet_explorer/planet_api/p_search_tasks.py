@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    p_search_tasks.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 Planet Inc, https://planet.com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+__author__ = "Planet Federal"
+__date__ = "October 2026"
+__copyright__ = "(C) 2026 Planet Inc, https://planet.com"
+
+# This will get replaced with a git SHA1 when you do a git archive
+__revision__ = "$Format:%H$"
+
+import traceback
+
+from planet.api.models import Items
+from qgis.core import Qgis, QgsMessageLog, QgsTask
+from qgis.PyQt.QtCore import pyqtSignal
+
+from ..pe_utils import QGIS_LOG_SECTION_NAME
+
+
+class DailyImagesSearchTask(QgsTask):
+    """
+    Runs a daily imagery search away from the GUI thread.
+
+    The first run of a search queries the stats endpoint and opens the
+    paged search. Each run then fetches a single page of results and
+    emits it as soon as it arrives. Passing the ``response_iterator`` of a
+    previous task continues the same search with its next page.
+    """
+
+    totalCountReceived = pyqtSignal(int)
+    pageReceived = pyqtSignal(list, bool)
+
+    def __init__(self, p_client, request, sort, page_size, response_iterator=None):
+        super().__init__("Searching Planet daily imagery", QgsTask.CanCancel)
+        self.exception = None
+        self.p_client = p_client
+        self.request = request
+        self.sort = sort
+        self.page_size = page_size
+        self.response_iterator = response_iterator
+
+    def run(self):
+        try:
+            if self.response_iterator is None:
+                stats_request = {"interval": "year"}
+                stats_request.update(self.request)
+                resp = self.p_client.stats(stats_request).get()
+                total_count = sum([b["count"] for b in resp["buckets"]])
+                self.setProgress(25)
+                if self.isCanceled():
+                    return False
+                self.totalCountReceived.emit(total_count)
+                if not total_count:
+                    return True
+                response = self.p_client.quick_search(
+                    self.request, page_size=self.page_size, sort=self.sort
+                )
+                self.response_iterator = response.iter()
+                self.setProgress(50)
+                if self.isCanceled():
+                    return False
+
+            page = next(self.response_iterator, None)
+            if page is None:
+                self.pageReceived.emit([], False)
+                return True
+            body = page.get()
+            images = body.get(Items.ITEM_KEY) or []
+            has_more = body[Items.LINKS_KEY].get(Items.NEXT_KEY) is not None
+            if self.isCanceled():
+                return False
+            self.setProgress(100)
+            self.pageReceived.emit(images, has_more)
+            return True
+        except Exception:
+            self.exception = traceback.format_exc()
+            return False
+
+    def finished(self, result):
+        if not result and self.exception is not None:
+            QgsMessageLog.logMessage(
+                f"Daily imagery search failed.\n{self.exception}",
+                QGIS_LOG_SECTION_NAME,
+                Qgis.Warning,
+            )
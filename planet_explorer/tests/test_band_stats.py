@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+from osgeo import gdal
+
+from planet_explorer.planet_api.p_band_stats import (
+    read_band_stats,
+    stats_path,
+    write_band_stats,
+)
+
+
+def create_raster(path):
+    ds = gdal.GetDriverByName("GTiff").Create(path, 100, 100, 2, gdal.GDT_UInt16)
+    values = np.arange(10000, dtype=np.uint16).reshape(100, 100)
+    ds.GetRasterBand(1).WriteArray(values)
+    band = ds.GetRasterBand(2)
+    band.WriteArray(values * 2)
+    band.SetNoDataValue(0)
+    ds = None
+
+
+def test_band_stats_sidecar(tmp_path):
+    path = str(tmp_path / "scene.tif")
+    create_raster(path)
+    assert read_band_stats(path) is None
+
+    stats = write_band_stats(path)
+    assert os.path.exists(stats_path(path))
+    low, high = stats[0]
+    assert abs(low - 200) < 1 and abs(high - 9800) < 1
+    assert read_band_stats(path) == stats
+
+    # statistics are computed again once the raster changes
+    create_raster(path)
+    os.utime(path, (1, 1))
+    assert read_band_stats(path) is None
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+
+from planet_explorer.planet_api.p_checksums import (
+    Checksum,
+    ChecksumVerifier,
+    file_digest,
+    manifest_checksums,
+)
+
+
+def write_manifest(folder, files):
+    entries = []
+    for name, data in files.items():
+        (folder / name).write_bytes(data)
+        entries.append(
+            {
+                "path": name,
+                "media_type": "image/tiff",
+                "size": len(data),
+                "digests": {
+                    "md5": hashlib.md5(data).hexdigest(),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                },
+            }
+        )
+    entries.append({"path": "no_digest.xml", "media_type": "text/xml"})
+    manifest_file = folder / "manifest.json"
+    manifest_file.write_text(json.dumps({"files": entries}))
+    return str(manifest_file)
+
+
+def test_file_digest(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    (tmp_path / "a.tif").write_bytes(data)
+    assert file_digest(str(tmp_path / "a.tif"), "sha256") == (
+        hashlib.sha256(data).hexdigest(),
+        len(data),
+    )
+
+
+def test_manifest_checksums_prefer_sha256(tmp_path):
+    data = os.urandom(1000)
+    manifest_file = write_manifest(tmp_path, {"a.tif": data})
+    assert manifest_checksums(manifest_file) == [
+        Checksum(str(tmp_path / "a.tif"), "sha256", hashlib.sha256(data).hexdigest())
+    ]
+
+
+def test_checksum_verifier_reports_mismatches(tmp_path):
+    files = {f"{i}.tif": os.urandom(500000) for i in range(6)}
+    manifest_file = write_manifest(tmp_path, files)
+    (tmp_path / "2.tif").write_bytes(b"corrupted")
+    os.remove(tmp_path / "4.tif")
+    throughputs = []
+    with ChecksumVerifier(workers=3, progress_callback=throughputs.append) as verifier:
+        futures = [verifier.verify(c) for c in manifest_checksums(manifest_file)]
+        mismatches = [f.result() for f in futures if f.result() is not None]
+    assert sorted(os.path.basename(m.path) for m in mismatches) == ["2.tif", "4.tif"]
+    missing = [m for m in mismatches if m.path.endswith("4.tif")][0]
+    assert missing.actual is None
+    assert len(throughputs) == 6
+    assert verifier.throughput() > 0
@@ -6,7 +6,11 @@ import json
 from qgis.PyQt import QtCore
 from qgis.core import QgsProject, QgsVectorLayer
 
-from planet_explorer.tests.utils import qgis_debug_wait
+from planet_explorer.tests.utils import (
+    click_daily_result,
+    perform_daily_search,
+    qgis_debug_wait,
+)
 from planet_explorer.gui.pe_range_slider import PlanetExplorerRangeSlider
 from planet_explorer.gui.pe_filters import PlanetAOIFilter
 
@@ -45,10 +49,10 @@ def test_search_default_filter(
     qgis_debug_wait(qtbot, qgis_debug_enabled)
     qtbot.keyClicks(dock_widget._aoi_filter.leAOI, sample_aoi)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     # just verify that at least some images are showing
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    assert dock_widget.searchResultsWidget.tree.topLevelItemCount() > 1
+    assert dock_widget.searchResultsWidget.model.rowCount() > 1
     images_found = int(
         dock_widget.searchResultsWidget.lblImageCount.text().split(" ")[0]
     )
@@ -83,13 +87,13 @@ def test_search_date_time_filter(
     # click the back button and execute the search
     qtbot.mouseClick(dock_widget.btnBackFromFilters, QtCore.Qt.LeftButton)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # make sure all items from the search are correct
-    results_tree = dock_widget.searchResultsWidget.tree
-    for index in range(results_tree.topLevelItemCount()):
-        for image in results_tree.topLevelItem(index).images():
+    date_nodes = dock_widget.searchResultsWidget.model.date_nodes()
+    for index in range(len(date_nodes)):
+        for image in date_nodes[index].images():
             assert (
                 datetime.datetime.strptime(
                     image["properties"]["published"], DATE_TIME_FORMAT
@@ -148,15 +152,15 @@ def test_search_item_type_filter(
     # click the back button and execute the search
     qtbot.mouseClick(dock_widget.btnBackFromFilters, QtCore.Qt.LeftButton)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # make sure all items from the search are correct
-    results_tree = dock_widget.searchResultsWidget.tree
-    assert results_tree.topLevelItemCount() >= 1
+    date_nodes = dock_widget.searchResultsWidget.model.date_nodes()
+    assert len(date_nodes) >= 1
 
-    for index in range(results_tree.topLevelItemCount()):
-        assert results_tree.topLevelItem(index).itemtype == item_type
+    for index in range(len(date_nodes)):
+        assert date_nodes[index].itemtype == item_type
 
 
 @pytest.mark.parametrize("band", ["4Band", "8Band"])
@@ -198,14 +202,14 @@ def test_search_spectral_band_filter(
     # click the back button and execute the search
     qtbot.mouseClick(dock_widget.btnBackFromFilters, QtCore.Qt.LeftButton)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # make sure all items from the search are correct
-    results_tree = dock_widget.searchResultsWidget.tree
-    assert results_tree.topLevelItemCount() >= 1
+    date_nodes = dock_widget.searchResultsWidget.model.date_nodes()
+    assert len(date_nodes) >= 1
 
-    for image in results_tree.topLevelItem(0).images():
+    for image in date_nodes[0].images():
         if band == "4Band":
             assert "basic_analytic_4b" in image["assets"]
         if band == "8Band":
@@ -251,16 +255,16 @@ def test_search_instrument_filter(
     # click the back button and execute the search
     qtbot.mouseClick(dock_widget.btnBackFromFilters, QtCore.Qt.LeftButton)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # if no images found, just skip the test
     # TODO: extend the date range?
-    results_tree = dock_widget.searchResultsWidget.tree
-    if results_tree.topLevelItemCount() == 0:
+    date_nodes = dock_widget.searchResultsWidget.model.date_nodes()
+    if len(date_nodes) == 0:
         pytest.skip(f"No images found with instrument: {instrument}")
 
-    for image in results_tree.topLevelItem(0).images():
+    for image in date_nodes[0].images():
         assert instrument == image["properties"]["instrument"]
 
 
@@ -287,14 +291,14 @@ def test_search_item_id_filter(
     # click the back button and execute the search
     qtbot.mouseClick(dock_widget.btnBackFromFilters, QtCore.Qt.LeftButton)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # make sure all items from the search are correct
-    results_tree = dock_widget.searchResultsWidget.tree
-    assert results_tree.topLevelItemCount() == 1
+    date_nodes = dock_widget.searchResultsWidget.model.date_nodes()
+    assert len(date_nodes) == 1
     # make sure the item id for the returned image is correct
-    assert results_tree.topLevelItem(0).images()[0]["id"] == item_id
+    assert date_nodes[0].images()[0]["id"] == item_id
 
 
 @pytest.mark.parametrize(
@@ -346,13 +350,13 @@ def test_search_env_conditions_filter(
     # click the back button and execute the search
     qtbot.mouseClick(dock_widget.btnBackFromFilters, QtCore.Qt.LeftButton)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # make sure all items from the search are correct
-    results_tree = dock_widget.searchResultsWidget.tree
-    for index in range(results_tree.topLevelItemCount()):
-        for image in results_tree.topLevelItem(index).images():
+    date_nodes = dock_widget.searchResultsWidget.model.date_nodes()
+    for index in range(len(date_nodes)):
+        for image in date_nodes[index].images():
             assert image["properties"][data_api_name] <= max_
             assert image["properties"][data_api_name] >= min_
 
@@ -369,16 +373,14 @@ def test_preview_daily_imagery(
     qgis_debug_wait(qtbot, qgis_debug_enabled)
     qtbot.keyClicks(dock_widget._aoi_filter.leAOI, sample_aoi)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(dock_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, dock_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # grab the first result and add it to the canvas
-    results_tree = dock_widget.searchResultsWidget.tree
-    item_widget = results_tree.itemWidget(results_tree.topLevelItem(0), 0)
-    qtbot.mouseClick(item_widget.labelZoomTo, QtCore.Qt.LeftButton)
+    click_daily_result(qtbot, dock_widget, "zoom")
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
-    qtbot.mouseClick(item_widget.labelAddPreview, QtCore.Qt.LeftButton)
+    click_daily_result(qtbot, dock_widget, "preview")
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     layers = QgsProject.instance().mapLayers().values()
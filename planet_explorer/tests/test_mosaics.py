@@ -0,0 +1,112 @@
+import json
+import os
+
+from osgeo import gdal
+
+from planet_explorer.planet_api.p_mosaics import (
+    MOSAIC_GPKG,
+    MOSAIC_VRT,
+    all_valid_rasters,
+    build_mosaic,
+    build_vrt,
+    is_mosaic_current,
+    manifest_rasters,
+    mosaic_groups,
+    write_mosaic_sources,
+)
+
+
+def create_quads(folder, datatype=gdal.GDT_Byte):
+    paths = []
+    for i in range(2):
+        path = str(folder / f"quad_{i}.tif")
+        ds = gdal.GetDriverByName("GTiff").Create(path, 512, 512, 3, datatype)
+        ds.SetGeoTransform([i * 512, 1, 0, 0, 0, -1])
+        ds = None
+        paths.append(path)
+    return paths
+
+
+def test_all_valid_rasters(tmp_path):
+    paths = create_quads(tmp_path)
+    assert all_valid_rasters(paths)
+    (tmp_path / "broken.tif").write_bytes(b"not a tiff")
+    assert not all_valid_rasters(paths + [str(tmp_path / "broken.tif")])
+
+
+def test_build_mosaic(tmp_path):
+    paths = create_quads(tmp_path)
+    vrt = build_mosaic(str(tmp_path / "mosaic"), paths, MOSAIC_VRT)
+    assert vrt.endswith(".vrt")
+    assert gdal.Open(vrt).RasterXSize == 1024
+
+    gpkg = build_mosaic(str(tmp_path / "mosaic"), paths, MOSAIC_GPKG)
+    assert gpkg.endswith(".gpkg")
+    ds = gdal.Open(gpkg)
+    assert ds.RasterXSize == 1024
+    assert ds.GetRasterBand(1).GetOverviewCount() > 0
+    assert not os.path.exists(str(tmp_path / "mosaic.vrt"))
+
+
+def test_build_geopackage_mosaic_falls_back_to_vrt(tmp_path):
+    paths = create_quads(tmp_path, gdal.GDT_UInt16)
+    assert build_mosaic(str(tmp_path / "mosaic"), paths, MOSAIC_GPKG).endswith(".vrt")
+
+
+def test_mosaic_sources(tmp_path):
+    paths = create_quads(tmp_path)
+    vrt = str(tmp_path / "mosaic.vrt")
+    assert not is_mosaic_current(vrt, paths)
+    build_vrt(vrt, paths)
+    assert not is_mosaic_current(vrt, paths)
+    write_mosaic_sources(vrt, paths)
+    assert is_mosaic_current(vrt, paths)
+    assert not is_mosaic_current(vrt, paths[:1])
+
+    os.utime(paths[0], (0, 0))
+    assert not is_mosaic_current(vrt, paths)
+    write_mosaic_sources(vrt, paths)
+    os.remove(vrt)
+    assert not is_mosaic_current(vrt, paths)
+
+
+def test_manifest_mosaic_groups(tmp_path):
+    files = []
+    for item_id in ["20230102_101010_00_1", "20230101_101010_00_2"]:
+        for asset_type in ["ortho_visual", "ortho_analytic_4b_sr", "ortho_udm2"]:
+            files.append(
+                {
+                    "path": f"files/{item_id}_{asset_type}.tif",
+                    "media_type": "image/tiff",
+                    "annotations": {
+                        "planet/asset_type": asset_type,
+                        "planet/item_id": item_id,
+                        "planet/item_type": "PSScene",
+                    },
+                }
+            )
+    (tmp_path / "files").mkdir()
+    metadata = tmp_path / "files" / "20230102_101010_00_1_metadata.json"
+    metadata.write_text(
+        json.dumps({"properties": {"acquired": "2022-12-31T00:00:00Z"}})
+    )
+    files.append(
+        {
+            "path": "files/20230102_101010_00_1_metadata.json",
+            "media_type": "application/json",
+            "annotations": {"planet/item_id": "20230102_101010_00_1"},
+        }
+    )
+    manifest_file = tmp_path / "manifest.json"
+    manifest_file.write_text(json.dumps({"files": files}))
+
+    groups = mosaic_groups(manifest_rasters(str(manifest_file)))
+    assert sorted(groups) == [
+        ("PSScene", "ortho_analytic_4b_sr"),
+        ("PSScene", "ortho_visual"),
+    ]
+    # sorted by the acquisition date in the metadata, not by id
+    assert [r.item_id for r in groups[("PSScene", "ortho_visual")]] == [
+        "20230102_101010_00_1",
+        "20230101_101010_00_2",
+    ]
@@ -11,7 +11,11 @@ from planet_explorer.tests.utils import get_random_string
 from planet_explorer.planet_api.p_quad_orders import QuadOrder
 
 
-from planet_explorer.tests.utils import qgis_debug_wait
+from planet_explorer.tests.utils import (
+    click_daily_result,
+    perform_daily_search,
+    qgis_debug_wait,
+)
 from ..pe_utils import orders_download_folder
 
 pytestmark = [pytest.mark.qgis_show_map(add_basemap=False, timeout=1)]
@@ -28,15 +32,11 @@ def checked_images(
     qgis_debug_wait(qtbot, qgis_debug_enabled)
     qtbot.keyClicks(daily_images_widget._aoi_filter.leAOI, sample_aoi)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(daily_images_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, daily_images_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     # order the first result
-    results_tree = daily_images_widget.searchResultsWidget.tree
-    checkbox = results_tree.itemWidget(results_tree.topLevelItem(0), 0).checkBox
-    qtbot.mouseClick(
-        checkbox, QtCore.Qt.LeftButton, pos=QtCore.QPoint(2, int(checkbox.height() / 2))
-    )
+    click_daily_result(qtbot, daily_images_widget, "checkbox")
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     yield dock_widget, daily_images_widget
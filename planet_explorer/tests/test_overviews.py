@@ -0,0 +1,43 @@
+import os
+
+from osgeo import gdal
+
+from planet_explorer.planet_api.p_overviews import (
+    OPTIMIZE_COG,
+    OPTIMIZE_EXTERNAL_OVERVIEWS,
+    OPTIMIZE_INTERNAL_OVERVIEWS,
+    optimize_raster,
+    overview_levels,
+)
+
+
+def create_raster(path, size=1024):
+    ds = gdal.GetDriverByName("GTiff").Create(path, size, size, 3, gdal.GDT_Byte)
+    ds.SetGeoTransform([0, 1, 0, 0, 0, -1])
+    for i in range(3):
+        ds.GetRasterBand(i + 1).Fill(i * 50)
+    ds = None
+
+
+def overview_count(path):
+    ds = gdal.Open(path)
+    return ds.GetRasterBand(1).GetOverviewCount()
+
+
+def test_overview_levels():
+    assert overview_levels(200, 100) == []
+    assert overview_levels(1024, 700) == [2, 4]
+    assert overview_levels(4096, 4096) == [2, 4, 8, 16]
+
+
+def test_optimize_raster(tmp_path):
+    for mode in [
+        OPTIMIZE_INTERNAL_OVERVIEWS,
+        OPTIMIZE_EXTERNAL_OVERVIEWS,
+        OPTIMIZE_COG,
+    ]:
+        path = str(tmp_path / f"{mode}.tif")
+        create_raster(path)
+        optimize_raster(path, mode)
+        assert overview_count(path) == 2
+        assert os.path.exists(f"{path}.ovr") == (mode == OPTIMIZE_EXTERNAL_OVERVIEWS)
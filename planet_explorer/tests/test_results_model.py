@@ -0,0 +1,216 @@
+import datetime
+import statistics
+import time
+
+import pytest
+
+from qgis.PyQt.QtCore import Qt
+
+from planet_explorer.gui.pe_dailyimages_results_model import (
+    DailyImagesResultsModel,
+    scene_records,
+)
+from planet_explorer.pe_utils import AoiCoverageCalculator
+from planet_explorer.planet_api import PlanetClient
+
+PAGE_SIZE = 250
+PAGES = 40
+DATES_PER_PAGE = 25
+SATELLITES_PER_DATE = 5
+
+
+def fake_image(index, day, satellite, item_type="PSScene"):
+    acquired = datetime.datetime(2020, 1, 1, 10, 0, 0) + datetime.timedelta(
+        days=day, seconds=index
+    )
+    return {
+        "id": f"{acquired:%Y%m%d_%H%M%S}_{index}",
+        "_links": {"thumbnail": f"https://example.com/thumb/{index}"},
+        "_permissions": ["assets.basic_analytic_4b:download"],
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]],
+        },
+        "properties": {
+            "acquired": acquired.isoformat() + "Z",
+            "item_type": item_type,
+            "satellite_id": f"sat{satellite}",
+            "instrument": "PSB.SD",
+        },
+    }
+
+
+def fake_page(page):
+    images = []
+    for i in range(PAGE_SIZE):
+        day = page * DATES_PER_PAGE + i % DATES_PER_PAGE
+        satellite = (i // DATES_PER_PAGE) % SATELLITES_PER_DATE
+        images.append(fake_image(page * PAGE_SIZE + i, day, satellite))
+    return images
+
+
+def add_images(results_model, images):
+    results_model.add_records(scene_records(images))
+
+
+@pytest.fixture
+def results_model(monkeypatch):
+    monkeypatch.setattr(
+        PlanetClient,
+        "item_types_names",
+        lambda self: {"PSScene": "PlanetScope Scene", "SkySatScene": "SkySat Scene"},
+    )
+    yield DailyImagesResultsModel()
+
+
+def test_results_model_groups_scenes(results_model):
+    add_images(
+        results_model,
+        [
+            fake_image(0, 0, 0),
+            fake_image(1, 0, 1),
+            fake_image(2, 0, 0, item_type="SkySatScene"),
+        ],
+    )
+    add_images(results_model, [fake_image(3, 0, 0), fake_image(4, 1, 0)])
+
+    date_nodes = results_model.date_nodes()
+    assert len(date_nodes) == 3
+    assert [n.itemtype for n in date_nodes] == ["PSScene", "SkySatScene", "PSScene"]
+    assert [len(n.children) for n in date_nodes] == [2, 1, 1]
+    assert len(date_nodes[0].children[0].children) == 2
+    assert not date_nodes[0].has_new
+    assert date_nodes[2].has_new
+    assert len(results_model.scene_nodes()) == 5
+
+
+def test_results_model_scene_rows(results_model):
+    # scenes are sorted by acquisition time, so later pages shift the rows
+    # of the scenes already added
+    add_images(results_model, [fake_image(i, 0, 0) for i in (5, 8)])
+    satellite_node = results_model.date_nodes()[0].children[0]
+    scene_node = satellite_node.children[1]
+    assert results_model.index_for_node(scene_node).row() == 1
+    add_images(results_model, [fake_image(i, 0, 0) for i in (9, 1, 6, 3)])
+
+    for row, node in enumerate(satellite_node.children):
+        index = results_model.index_for_node(node)
+        assert index.row() == row
+        assert results_model.node(index) is node
+    assert results_model.index_for_node(scene_node).row() == 4
+
+
+def test_results_model_checked_scenes(results_model):
+    locked = fake_image(2, 0, 1)
+    locked["_permissions"] = []
+    add_images(results_model, [fake_image(0, 0, 0), fake_image(1, 0, 0), locked])
+    signals = []
+    results_model.checkStateChanged.connect(lambda: signals.append(True))
+
+    date_index = results_model.index(0, 0)
+    assert results_model.setData(date_index, Qt.Checked, Qt.CheckStateRole)
+    assert len(signals) == 1
+    assert results_model.checked_count() == 2
+    assert results_model.data(date_index, Qt.CheckStateRole) == Qt.Checked
+
+    satellite_index = results_model.index(0, 0, date_index)
+    scene_index = results_model.index(0, 0, satellite_index)
+    results_model.setData(scene_index, Qt.Unchecked, Qt.CheckStateRole)
+    assert results_model.checked_count() == 1
+    assert [img["id"] for img in results_model.checked_images()] == [
+        fake_image(1, 0, 0)["id"]
+    ]
+    assert results_model.data(date_index, Qt.CheckStateRole) == Qt.PartiallyChecked
+
+    results_model.setData(date_index, Qt.Unchecked, Qt.CheckStateRole)
+    assert results_model.checked_count() == 0
+    assert len(signals) == 3
+
+
+def square(x, y, size):
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[x, y], [x, y + size], [x + size, y + size], [x + size, y], [x, y]]
+        ],
+    }
+
+
+def test_aoi_coverage_calculator():
+    request = {
+        "filter": {
+            "type": "AndFilter",
+            "config": [
+                {
+                    "field_name": "geometry",
+                    "type": "GeometryFilter",
+                    "config": square(0, 0, 2),
+                }
+            ],
+        }
+    }
+    calculator = AoiCoverageCalculator(request)
+    images = [
+        {"id": "partial", "geometry": square(0, 0, 1)},
+        {"id": "full", "geometry": square(-1, -1, 4)},
+        {"id": "outside", "geometry": square(5, 5, 1)},
+    ]
+    assert calculator.coverages(images) == pytest.approx([25, 100, 0])
+    # results are cached by id
+    assert calculator.coverage({"id": "partial", "geometry": square(5, 5, 1)}) == 25
+
+    assert AoiCoverageCalculator({"filter": {"config": []}}).coverage(images[0]) is None
+
+
+def test_results_model_page_insert_is_incremental(results_model):
+    """
+    The number of groups grows with every page of search results, but the
+    rows inserted and refreshed to add a page must not.
+    """
+    signals = []
+    results_model.rowsInserted.connect(lambda *args: signals.append("inserted"))
+    results_model.dataChanged.connect(lambda *args: signals.append("changed"))
+    results_model.layoutChanged.connect(lambda *args: signals.append("layout"))
+    results_model.modelReset.connect(lambda: signals.append("reset"))
+
+    counts = []
+    for page in range(PAGES):
+        signals.clear()
+        add_images(results_model, fake_page(page))
+        counts.append(
+            {signal: signals.count(signal) for signal in ("inserted", "changed")}
+        )
+        assert "layout" not in signals
+        assert "reset" not in signals
+
+    assert len(results_model.date_nodes()) == PAGES * DATES_PER_PAGE
+    groups = DATES_PER_PAGE + DATES_PER_PAGE * SATELLITES_PER_DATE
+    # new groups and scenes are inserted, touched groups refreshed
+    assert counts[0] == {"inserted": groups + PAGE_SIZE, "changed": groups}
+    # groups added by the previous page also stop being new
+    later_page = {"inserted": groups + PAGE_SIZE, "changed": groups * 2}
+    assert counts[1:] == [later_page] * (PAGES - 1)
+
+
+@pytest.mark.benchmark
+def test_results_model_page_insert_time_is_flat(results_model, record_property):
+    """
+    Benchmark for adding search results pages to the model. The number of
+    groups grows with every page, but the time needed to place a page and
+    refresh the groups it touched must not.
+    """
+    timings = []
+    for page in range(PAGES):
+        images = fake_page(page)
+        start = time.perf_counter()
+        add_images(results_model, images)
+        timings.append(time.perf_counter() - start)
+
+    assert len(results_model.date_nodes()) == PAGES * DATES_PER_PAGE
+    first = statistics.median(timings[:5]) * 1000
+    last = statistics.median(timings[-5:]) * 1000
+    record_property("first_pages_ms", round(first, 2))
+    record_property("last_pages_ms", round(last, 2))
+    assert (
+        last < first * 3
+    ), f"page insert time grew from {first:.1f} ms to {last:.1f} ms"
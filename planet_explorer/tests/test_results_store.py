@@ -0,0 +1,130 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from planet_explorer.gui.pe_dailyimages_results_store import (
+    DailyImagesResultsStore,
+    FilterRange,
+)
+
+BASE_DATE = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def fake_record(index, day, cloud_cover, gsd=3.0):
+    acquired = BASE_DATE + datetime.timedelta(days=day, hours=index % 24)
+    return SimpleNamespace(
+        id=f"scene_{index}",
+        epoch=acquired.timestamp(),
+        geom=None,
+        image={
+            "id": f"scene_{index}",
+            "properties": {"cloud_cover": cloud_cover, "gsd": gsd},
+        },
+    )
+
+
+def search_request(
+    cloud_cover=None, start="2020-01-01", end="2020-02-01", item_types=None
+):
+    config = [
+        {
+            "field_name": "geometry",
+            "type": "GeometryFilter",
+            "config": {"type": "Point"},
+        },
+        {
+            "field_name": "acquired",
+            "type": "DateRangeFilter",
+            "config": {"gte": start, "lte": end},
+        },
+    ]
+    if cloud_cover is not None:
+        config.append(
+            {"field_name": "cloud_cover", "type": "RangeFilter", "config": cloud_cover}
+        )
+    return {
+        "item_types": item_types or ["PSScene"],
+        "filter": {"type": "AndFilter", "config": config},
+    }
+
+
+@pytest.fixture
+def store():
+    store = DailyImagesResultsStore()
+    store.reset(search_request(cloud_cover={"lte": 0.5}))
+    records = [fake_record(i, i % 30, (i % 6) / 10) for i in range(3000)]
+    store.append(records[:1000])
+    assert not store.can_refine(search_request(cloud_cover={"lte": 0.2}))
+    store.append(records[1000:])
+    store.set_complete()
+    yield store
+
+
+@pytest.mark.parametrize(
+    "request_kwargs, can_refine",
+    [
+        pytest.param({"cloud_cover": {"lte": 0.5}}, True, id="same_request"),
+        pytest.param({"cloud_cover": {"lte": 0.2}}, True, id="tighter_range"),
+        pytest.param(
+            {"cloud_cover": {"gte": 0.1, "lte": 0.3}}, True, id="tighter_both"
+        ),
+        pytest.param(
+            {"cloud_cover": {"lte": 0.2}, "start": "2020-01-10"},
+            True,
+            id="tighter_date",
+        ),
+        pytest.param({"cloud_cover": {"lte": 0.8}}, False, id="wider_range"),
+        pytest.param({}, False, id="range_removed"),
+        pytest.param(
+            {"cloud_cover": {"lte": 0.2}, "end": "2020-03-01"}, False, id="wider_date"
+        ),
+        pytest.param(
+            {"cloud_cover": {"lte": 0.2}, "item_types": ["SkySatScene"]},
+            False,
+            id="other_item_types",
+        ),
+    ],
+)
+def test_store_can_refine(store, request_kwargs, can_refine):
+    assert store.can_refine(search_request(**request_kwargs)) == can_refine
+
+
+def test_store_query(store):
+    request = search_request(cloud_cover={"lte": 0.2}, start="2020-01-10")
+    records = store.query(request)
+    start = datetime.datetime(2020, 1, 10, tzinfo=datetime.timezone.utc).timestamp()
+    assert records
+    assert all(r.image["properties"]["cloud_cover"] <= 0.2 for r in records)
+    assert all(r.epoch >= start for r in records)
+    epochs = [r.epoch for r in records]
+    assert epochs == sorted(epochs, reverse=True)
+
+    ascending = store.query(request, ascending=True)
+    assert [r.epoch for r in ascending] == sorted(epochs)
+
+
+def test_store_query_area_coverage(store):
+    class Calculator:
+        def has_aoi(self):
+            return True
+
+        def coverages(self, images, geoms):
+            return [int(img["id"].split("_")[1]) % 100 for img in images]
+
+    records = store.query(
+        search_request(cloud_cover={"lte": 0.5}),
+        coverage_calculator=Calculator(),
+        coverage_range=FilterRange.from_config({"gte": 90}),
+    )
+    assert records
+    assert all(int(r.id.split("_")[1]) % 100 >= 90 for r in records)
+
+
+def test_filter_range_contains():
+    base = FilterRange.from_config({"gte": 0, "lte": 10})
+    assert base.contains(FilterRange.from_config({"gte": 1, "lt": 10}))
+    assert not base.contains(FilterRange.from_config({"gte": -1, "lte": 10}))
+    assert not FilterRange.from_config({"gt": 0}).contains(
+        FilterRange.from_config({"gte": 0})
+    )
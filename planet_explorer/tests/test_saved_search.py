@@ -2,7 +2,11 @@ import pytest
 from qgis.PyQt import QtCore
 from planet_explorer.gui.pe_open_saved_search_dialog import OpenSavedSearchDialog
 from planet_explorer.gui.pe_save_search_dialog import SaveSearchDialog
-from planet_explorer.tests.utils import qgis_debug_wait, get_random_string
+from planet_explorer.tests.utils import (
+    get_random_string,
+    perform_daily_search,
+    qgis_debug_wait,
+)
 
 pytestmark = [pytest.mark.qgis_show_map(add_basemap=False, timeout=1)]
 
@@ -52,7 +56,7 @@ def test_create(qtbot, logged_in_explorer_dock_widget, qgis_debug_enabled, sampl
     qgis_debug_wait(qtbot, qgis_debug_enabled)
     qtbot.keyClicks(daily_images_widget._aoi_filter.leAOI, sample_aoi)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
-    qtbot.mouseClick(daily_images_widget.btnSearch, QtCore.Qt.LeftButton)
+    perform_daily_search(qtbot, daily_images_widget)
     qgis_debug_wait(qtbot, qgis_debug_enabled)
 
     dlg = SaveSearchDialog(daily_images_widget._request)
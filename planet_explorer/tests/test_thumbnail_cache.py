@@ -0,0 +1,51 @@
+import os
+
+from planet_explorer.gui.pe_thumbnail_cache import (
+    DiskLRUCache,
+    MemoryLRUCache,
+    thumbnail_cache_key,
+)
+
+
+def test_thumbnail_cache_key_ignores_api_key():
+    url = "https://tiles.planet.com/data/v1/item-types/PSScene/items/20200101_1/thumb"
+    assert thumbnail_cache_key(f"{url}?api_key=one") == thumbnail_cache_key(
+        f"{url}?api_key=two"
+    )
+    assert thumbnail_cache_key(f"{url}?width=512&api_key=one") != thumbnail_cache_key(
+        url
+    )
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryLRUCache(max_cost=30)
+    cache.put("a", "A", 10)
+    cache.put("b", "B", 10)
+    cache.put("c", "C", 10)
+    assert cache.get("a") == "A"
+    cache.put("d", "D", 10)
+    assert "b" not in cache
+    assert [k for k in "acd" if k in cache] == ["a", "c", "d"]
+    assert cache.cost() == 30
+    cache.put("huge", "H", 100)
+    assert "huge" not in cache
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    folder = str(tmp_path / "thumbnails")
+    cache = DiskLRUCache(folder, max_bytes=300)
+    for key in ["a", "b", "c"]:
+        cache.put(key, key.encode() * 100)
+    assert cache.get("a") == b"a" * 100
+    cache.put("d", b"d" * 100)
+    assert cache.get("b") is None
+    assert cache.size() == 300
+    assert len(os.listdir(folder)) == 3
+
+    # recency survives a restart
+    cache = DiskLRUCache(folder, max_bytes=300)
+    assert len(cache) == 3
+    assert cache.get("a") == b"a" * 100
+    cache.set_max_bytes(200)
+    assert "c" not in cache
+    assert "a" in cache and "d" in cache
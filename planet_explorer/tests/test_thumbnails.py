@@ -0,0 +1,257 @@
+import gc
+
+import pytest
+
+from qgis.PyQt.QtGui import QImage
+from qgis.PyQt.QtNetwork import QNetworkReply, QNetworkRequest
+
+from planet_explorer.gui import pe_thumbnails
+from planet_explorer.gui.pe_thumbnail_cache import DiskLRUCache, thumbnail_cache_key
+from planet_explorer.gui.pe_thumbnails import (
+    BACKGROUND_PRIORITY,
+    MAX_CONCURRENT_DOWNLOADS,
+    MAX_RETRIES,
+    RETRY_DELAY,
+    VISIBLE_PRIORITY,
+    Thumbnail,
+    ThumbnailManager,
+)
+
+URL = "https://tiles.planet.com/data/v1/item-types/PSScene/items/{}/thumb"
+
+
+class FakeReply:
+    def __init__(self, request):
+        self._request = request
+        self._error = QNetworkReply.NoError
+        self._status = None
+        self.aborted = False
+
+    def request(self):
+        return self._request
+
+    def url(self):
+        return self._request.url().toString()
+
+    def error(self):
+        return self._error
+
+    def attribute(self, attribute):
+        if attribute == QNetworkRequest.HttpStatusCodeAttribute:
+            return self._status
+        return None
+
+    def readAll(self):
+        return b"thumbnail"
+
+    def abort(self):
+        self.aborted = True
+
+    def deleteLater(self):
+        pass
+
+
+class FakeNetworkAccessManager:
+    """
+    Keeps the replies to the requests made, so each test decides when and
+    how they finish
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.replies = []
+
+    def get(self, request):
+        reply = FakeReply(request)
+        self.replies.append(reply)
+        return reply
+
+    def in_flight(self):
+        return [r for r in self.replies if r in self.manager._replies.values()]
+
+    def finish(self, reply, status=None):
+        if status is not None:
+            reply._error = QNetworkReply.ContentNotFoundError
+            reply._status = status
+        self.manager.thumbnail_downloaded(reply)
+
+
+class FakeDecoder:
+    def __init__(self, manager):
+        self.manager = manager
+
+    def decode(self, key, data, source, disk_cache):
+        if data is None:
+            data = disk_cache.get(key)
+        thumbnail = None
+        if data is not None:
+            img = QImage(4, 4, QImage.Format_ARGB32)
+            thumbnail = Thumbnail(img, img)
+            if source == "network":
+                disk_cache.put(key, data)
+        self.manager._thumbnail_decoded(key, thumbnail, data, source)
+
+
+class FakeTimer:
+    timers = []
+
+    @classmethod
+    def singleShot(cls, delay, callback):
+        cls.timers.append((delay, callback))
+
+
+class FakeWidget:
+    def __init__(self):
+        self.thumbnails = []
+
+    def set_thumbnail(self, thumbnail):
+        self.thumbnails.append(thumbnail)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    FakeTimer.timers = []
+    monkeypatch.setattr(pe_thumbnails, "QTimer", FakeTimer)
+    manager = ThumbnailManager()
+    manager.nam = FakeNetworkAccessManager(manager)
+    manager.decoder = FakeDecoder(manager)
+    manager.disk_cache = DiskLRUCache(str(tmp_path / "thumbnails"), 1024 * 1024)
+    yield manager
+
+
+def test_thumbnail_manager_shares_downloads(manager):
+    widgets = [FakeWidget() for _ in range(3)]
+    for i, widget in enumerate(widgets):
+        manager.download_thumbnail(f"{URL.format(1)}?api_key={i}", widget)
+    assert len(manager.nam.replies) == 1
+
+    manager.nam.finish(manager.nam.replies[0])
+    assert all(len(w.thumbnails) == 1 for w in widgets)
+    assert manager.stats()["downloads"] == 1
+    assert manager.stats()["in_flight"] == 0
+
+    # later requests are served from the memory cache
+    widget = FakeWidget()
+    manager.download_thumbnail(URL.format(1), widget)
+    assert len(widget.thumbnails) == 1
+    assert len(manager.nam.replies) == 1
+    assert manager.stats()["memory_hits"] == 1
+
+
+def test_thumbnail_manager_reads_disk_cache(manager):
+    manager.download_thumbnail(URL.format(1), FakeWidget())
+    manager.nam.finish(manager.nam.replies[0])
+    assert thumbnail_cache_key(URL.format(1)) in manager.disk_cache
+
+    manager.thumbnails.clear()
+    widget = FakeWidget()
+    manager.download_thumbnail(URL.format(1), widget)
+    assert len(widget.thumbnails) == 1
+    assert len(manager.nam.replies) == 1
+    stats = manager.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_thumbnail_manager_retries_with_backoff(manager):
+    widget = FakeWidget()
+    manager.download_thumbnail(URL.format(1), widget)
+    for attempt in range(MAX_RETRIES):
+        manager.nam.finish(manager.nam.replies[-1], status=503)
+        assert len(FakeTimer.timers) == attempt + 1
+        delay, retry = FakeTimer.timers[-1]
+        assert delay == RETRY_DELAY * 2**attempt
+        # nothing is requested until the wait is over
+        assert len(manager.nam.replies) == attempt + 1
+        retry()
+        assert len(manager.nam.replies) == attempt + 2
+
+    manager.nam.finish(manager.nam.replies[-1], status=503)
+    assert len(FakeTimer.timers) == MAX_RETRIES
+    assert widget.thumbnails == []
+    stats = manager.stats()
+    assert stats["retries"] == MAX_RETRIES
+    assert stats["failures"] == 1
+    assert stats["downloads"] == MAX_RETRIES + 1
+
+
+def test_thumbnail_manager_does_not_retry_client_errors(manager):
+    widget = FakeWidget()
+    manager.download_thumbnail(URL.format(1), widget)
+    manager.nam.finish(manager.nam.replies[0], status=404)
+    assert FakeTimer.timers == []
+    assert manager.stats()["failures"] == 1
+
+
+def test_thumbnail_manager_retry_succeeds(manager):
+    widget = FakeWidget()
+    manager.download_thumbnail(URL.format(1), widget)
+    manager.nam.finish(manager.nam.replies[0], status=429)
+    FakeTimer.timers[0][1]()
+    manager.nam.finish(manager.nam.replies[1])
+    assert len(widget.thumbnails) == 1
+    assert manager.stats()["failures"] == 0
+
+
+def test_thumbnail_manager_cancel_while_waiting_to_retry(manager):
+    widget = FakeWidget()
+    manager.download_thumbnail(URL.format(1), widget)
+    manager.nam.finish(manager.nam.replies[0], status=503)
+    manager.cancel(widget)
+    FakeTimer.timers[0][1]()
+    assert len(manager.nam.replies) == 1
+    assert manager.stats()["cancelled"] == 1
+
+
+def test_thumbnail_manager_limits_and_prioritizes_downloads(manager):
+    widgets = [FakeWidget() for _ in range(MAX_CONCURRENT_DOWNLOADS + 2)]
+    for i, widget in enumerate(widgets):
+        manager.download_thumbnail(URL.format(i), widget, BACKGROUND_PRIORITY)
+    visible = FakeWidget()
+    manager.download_thumbnail(URL.format("visible"), visible, VISIBLE_PRIORITY)
+    assert len(manager.nam.replies) == MAX_CONCURRENT_DOWNLOADS
+    assert manager.stats()["queued"] == 3
+
+    # the visible thumbnail goes first, then the rest in request order
+    manager.nam.finish(manager.nam.replies[0])
+    assert URL.format("visible") in manager.nam.replies[-1].url()
+    manager.nam.finish(manager.nam.replies[1])
+    assert URL.format(MAX_CONCURRENT_DOWNLOADS) in manager.nam.replies[-1].url()
+    assert len(manager.nam.in_flight()) == MAX_CONCURRENT_DOWNLOADS
+
+    for reply in manager.nam.in_flight():
+        manager.nam.finish(reply)
+    for reply in manager.nam.in_flight():
+        manager.nam.finish(reply)
+    assert all(len(w.thumbnails) == 1 for w in widgets + [visible])
+    assert manager.stats()["in_flight"] == 0
+
+
+def test_thumbnail_manager_forgets_deleted_widgets(manager):
+    widgets = [FakeWidget() for _ in range(MAX_CONCURRENT_DOWNLOADS)]
+    for i, widget in enumerate(widgets):
+        manager.download_thumbnail(URL.format(i), widget)
+    manager.download_thumbnail(URL.format("deleted"), FakeWidget())
+    assert manager.stats()["queued"] == 1
+    gc.collect()
+
+    manager.nam.finish(manager.nam.replies[0])
+    assert len(manager.nam.replies) == MAX_CONCURRENT_DOWNLOADS
+    assert manager.stats()["queued"] == 0
+
+
+def test_thumbnail_manager_cancel_aborts_unshared_downloads(manager):
+    first, second = FakeWidget(), FakeWidget()
+    manager.download_thumbnail(URL.format(1), first)
+    manager.download_thumbnail(URL.format(1), second)
+    reply = manager.nam.replies[0]
+
+    manager.cancel(first)
+    assert not reply.aborted
+    manager.cancel(second)
+    assert reply.aborted
+    assert manager.stats()["in_flight"] == 0
+
+    # an aborted reply finishing later is ignored
+    manager.nam.finish(reply)
+    assert first.thumbnails == [] and second.thumbnails == []
@@ -39,6 +39,14 @@ def qgis_debug_wait(qtbot, qgis_debug_enabled, wait=1000):
         qtbot.wait(wait)
 
 
+def perform_daily_search(qtbot, daily_images_widget, timeout=60000):
+    """Clicks the search button and waits for the background search to finish."""
+    with qtbot.waitSignal(
+        daily_images_widget.searchResultsWidget.searchFinished, timeout=timeout
+    ):
+        qtbot.mouseClick(daily_images_widget.btnSearch, QtCore.Qt.LeftButton)
+
+
 def get_explorer_dockwidget(plugin_toolbar, login=True):
     """
     Setup the explorer dock_widget for tests
@@ -122,3 +130,14 @@ def get_recent_release_from_changelog(root_dir: pathlib.Path):
         )
     else:
         return recent_release
+
+
+def click_daily_result(qtbot, daily_images_widget, element, row=0):
+    """Clicks an element ("checkbox", "zoom" or "preview") of a top-level result."""
+    results_widget = daily_images_widget.searchResultsWidget
+    tree = results_widget.tree
+    index = results_widget.model.index(row, 0)
+    node = results_widget.model.node(index)
+    layout = results_widget.delegate.item_layout(tree.visualRect(index), node)
+    pos = getattr(layout, element).center()
+    qtbot.mouseClick(tree.viewport(), QtCore.Qt.LeftButton, pos=pos)